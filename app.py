@@ -1,20 +1,28 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
+from flask import (Flask, Blueprint, current_app, render_template, request, jsonify, redirect, url_for,
+                   flash, session, Response, stream_with_context)
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_bcrypt import Bcrypt
 from dotenv import load_dotenv
-import requests
+from sqlalchemy import select
 import os
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import io
+import hmac
 import base64
-import numpy as np
 import time
 import logging
 import json
+import math
 from models import db, User, Prediction
-from decimal import Decimal
+from database import primary_uri, replica_uri, engine_options, pool_stats
+from cache import TTLCache, make_key, shared_store
+from llm_client import OpenRouterClient, ModelHealthTracker, LLMError, LLMBusyError
+from jobs import JobManager, DatabaseJobStore, JobLimitError
+from user_cache import UserCache
+from write_buffer import WriteBehindBuffer, MODE_SYNC, MODE_BATCHED
+import history
+import user_stats
+from team_stats import TeamStatsService
+from startup import LazyModule, preload, preload_enabled
+from datetime import datetime
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO,
@@ -23,48 +31,268 @@ logging.basicConfig(level=logging.INFO,
 # Carga variables de entorno desde .env
 load_dotenv()
 
-app = Flask(__name__)
+# Dependencias pesadas (NumPy, matplotlib): se importan en el primer uso
+np = LazyModule('numpy')
+simulation = LazyModule('simulation')
+poisson_tables = LazyModule('poisson_tables')
+prediction_engine = LazyModule('prediction_engine')
+charts = LazyModule('charts')
 
-# Configuración de la aplicación
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev_secret_key_change_in_production')
+# PRELOAD_MODULES=1: cargarlas ya (p. ej. en el maestro de gunicorn antes del fork)
+if preload_enabled():
+    preload()
 
-# Configuración de MySQL
-app.config['SQLALCHEMY_DATABASE_URI'] = (
-    f"mysql+pymysql://{os.getenv('MYSQL_USER', 'root')}:"
-    f"{os.getenv('MYSQL_PASSWORD', '')}@"
-    f"{os.getenv('MYSQL_HOST', 'localhost')}:"
-    f"{os.getenv('MYSQL_PORT', '3306')}/"
-    f"{os.getenv('MYSQL_DATABASE', 'goal2goal_db')}"
-)
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SQLALCHEMY_ECHO'] = False
-
-# Inicializar extensiones
-db.init_app(app)
-bcrypt = Bcrypt(app)
-login_manager = LoginManager(app)
-login_manager.login_view = 'login'
+# Rutas de la aplicación (se registran en create_app)
+bp = Blueprint('main', __name__)
+
+# Extensiones (se inicializan con cada app en create_app)
+bcrypt = Bcrypt()
+login_manager = LoginManager()
+login_manager.login_view = 'main.login'
 login_manager.login_message = 'Por favor inicia sesión para acceder a Goal2Goal.'
 login_manager.login_message_category = 'info'
 
-# API Key de OpenRouter
+
+# Nombre del bind de la réplica de lectura
+REPLICA_BIND = 'replica'
+
+# Tras una escritura, el usuario lee de la principal durante estos segundos (retraso de replicación)
+REPLICA_STICKY_SECONDS = int(os.getenv('MYSQL_REPLICA_STICKY_SECONDS', 5))
+
+
+def default_config():
+    """Configuración de la aplicación a partir de las variables de entorno"""
+    config = {
+        'SECRET_KEY': os.getenv('SECRET_KEY', 'dev_secret_key_change_in_production'),
+        # Token para /internal/status (cabecera X-Internal-Token); sin él la ruta no existe
+        'INTERNAL_STATUS_TOKEN': os.getenv('INTERNAL_STATUS_TOKEN'),
+        # Configuración de MySQL (pool ajustable con DB_POOL_*, ver create_app)
+        'SQLALCHEMY_DATABASE_URI': primary_uri(),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'SQLALCHEMY_ECHO': False
+    }
+    # Réplica de lectura opcional para el historial y el dashboard
+    if replica_uri():
+        config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: dict(engine_options(replica_uri()), url=replica_uri())}
+    return config
+
+
+def read_engine():
+    """
+    Engine para consultas de solo lectura: la réplica si está configurada,
+    salvo justo después de que el usuario haya escrito (para que vea sus propios datos)
+    """
+    replica = db.engines.get(REPLICA_BIND)
+    if replica is None or session.get('last_write_at', 0) > time.time() - REPLICA_STICKY_SECONDS:
+        return db.engine
+    return replica
+
+
+def read_rows(statement):
+    """Ejecuta un SELECT en el engine de lectura y devuelve filas planas (sin objetos ORM)"""
+    return db.session.execute(statement, bind_arguments={'bind': read_engine()}).all()
+
+
+def read_row(statement):
+    """Como read_rows() para una sola fila (o None)"""
+    return db.session.execute(statement, bind_arguments={'bind': read_engine()}).first()
+
+
+def mark_write():
+    """Marca que el usuario acaba de escribir (lecturas a la principal durante REPLICA_STICKY_SECONDS)"""
+    session['last_write_at'] = time.time()
+
+
+# API Key de OpenRouter (se comprueba en la primera llamada a la IA, no al arrancar)
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-if not OPENROUTER_API_KEY:
-    raise RuntimeError(
-        "📣 La variable OPENROUTER_API_KEY no está definida.\n"
-        "   ➜ Crea un archivo .env en la raíz con:\n"
-        "     OPENROUTER_API_KEY=tu_api_key_aqui"
-    )
 
 OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
 
+# Modelos gratuitos de OpenRouter (en orden de preferencia)
+FALLBACK_MODELS = [
+    "x-ai/grok-4.1-fast:free",  # Intentar primero con Grok
+    "meta-llama/llama-3.2-3b-instruct:free"  # Fallback a Meta Llama
+]
+
+EXPLANATION_SYSTEM_PROMPT = "Eres un analista deportivo que explica predicciones BTTS de forma simple pero completa. Hablas como un amigo que enseña a un principiante. Usas lenguaje claro, sin tecnicismos complejos. Escribes en HTML con estilos inline. Párrafos de 3-4 líneas. Explicas el POR QUÉ de cada número con ejemplos simples. Das contexto a las estadísticas. IMPORTANTE: Siempre incluyes mensaje de juego responsable al final. Respondes COMPLETO en máximo 2500 tokens. NUNCA cortes la respuesta antes de terminar."
+EXPLANATION_TEMPERATURE = 0.65
+EXPLANATION_MAX_TOKENS = 2800
+
+# Cliente asíncrono compartido para OpenRouter (conexiones keep-alive y fallback con cobertura)
+# LLM_HEDGE_DELAY: segundos tras los que se lanza también el modelo de respaldo (0 = desactivado)
+# LLM_MAX_CONCURRENCY: por defecto la mitad de los hilos del worker (GUNICORN_THREADS), para que
+# las llamadas lentas a OpenRouter no ocupen todos los hilos que atienden peticiones
+llm_client = OpenRouterClient(
+    OPENROUTER_API_URL,
+    OPENROUTER_API_KEY,
+    timeout=float(os.getenv('LLM_TIMEOUT', 90)),
+    hedge_delay=float(os.getenv('LLM_HEDGE_DELAY', 0)) or None,
+    max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', max(1, int(os.getenv('GUNICORN_THREADS', 8)) // 2))),
+    health=ModelHealthTracker(
+        failure_threshold=int(os.getenv('LLM_BREAKER_THRESHOLD', 3)),
+        cooldown=float(os.getenv('LLM_BREAKER_COOLDOWN', 30))
+    )
+)
+
+# Caché de explicaciones generadas (clave: hash del prompt normalizado + modelo)
+EXPLANATION_CACHE_TTL = int(os.getenv('EXPLANATION_CACHE_TTL', 7 * 24 * 3600))
+explanation_cache = TTLCache(
+    max_entries=int(os.getenv('EXPLANATION_CACHE_SIZE', 256)),
+    ttl=EXPLANATION_CACHE_TTL,
+    store=shared_store('explanations', ttl=EXPLANATION_CACHE_TTL)
+)
+
+# Máximo de partidos por petición a /predict_batch
+MAX_BATCH_SIZE = 1000
+
+# Caché de resultados Monte Carlo (clave: lambdas cuantizadas + parámetros de simulación)
+MONTE_CARLO_CACHE_TTL = int(os.getenv('MONTE_CARLO_CACHE_TTL', 3600))
+MONTE_CARLO_CACHE_PRECISION = int(os.getenv('MONTE_CARLO_CACHE_PRECISION', 2))
+monte_carlo_cache = TTLCache(
+    max_entries=int(os.getenv('MONTE_CARLO_CACHE_SIZE', 512)),
+    ttl=MONTE_CARLO_CACHE_TTL,
+    store=shared_store('monte_carlo', ttl=MONTE_CARLO_CACHE_TTL,
+                       max_entries=int(os.getenv('MONTE_CARLO_STORE_SIZE', 8192)))
+)
+
+# Caché de gráficos PNG (clave: hash de las entradas), acotada por tamaño total.
+# /chart/<id> solo funciona con varios workers si la caché es compartida (CACHE_DIR)
+CHART_CACHE_TTL = int(os.getenv('CHART_CACHE_TTL', 24 * 3600))
+chart_cache = TTLCache(
+    max_entries=int(os.getenv('CHART_CACHE_SIZE', 1024)),
+    ttl=CHART_CACHE_TTL,
+    store=shared_store('charts', ttl=CHART_CACHE_TTL,
+                       max_bytes=int(os.getenv('CHART_STORE_MAX_BYTES', 256 * 1024 * 1024))),
+    max_bytes=int(os.getenv('CHART_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+)
+
+# Cola de trabajos en segundo plano (Monte Carlo y explicaciones largas). El estado vive en
+# background_jobs para que cualquier worker responda a /jobs/<id> y el límite sea global
+job_manager = JobManager(
+    max_workers=int(os.getenv('JOB_WORKERS', 4)),
+    max_per_user=int(os.getenv('JOB_MAX_PER_USER', 2)),
+    ttl=int(os.getenv('JOB_TTL', 3600)),
+    store=DatabaseJobStore(max_runtime=int(os.getenv('JOB_MAX_RUNTIME', 900)))
+)
+
+# Espera máxima (s) de una consulta de trabajo con ?wait=
+JOB_MAX_WAIT = 30
+
+# Guardado de predicciones: 'sync' (commit antes de responder) o 'batched' (write-behind)
+PREDICTION_WRITE_MODE = os.getenv('PREDICTION_WRITE_MODE', MODE_SYNC)
+prediction_writer = WriteBehindBuffer(
+    Prediction.__table__,
+    flush_rows=int(os.getenv('PREDICTION_FLUSH_ROWS', 100)),
+    flush_interval=int(os.getenv('PREDICTION_FLUSH_MS', 500)) / 1000,
+    # Agregados por usuario en la misma transacción que el INSERT
+    on_flush=user_stats.record_inserted
+)
+
+# Agregados por usuario para inserciones y borrados hechos con el ORM
+user_stats.listen_for_orm_changes()
+
+# Identidad de usuarios para load_user (evita un SELECT por petición autenticada)
+user_cache = UserCache(
+    ttl=int(os.getenv('USER_CACHE_TTL', 60)),
+    store=shared_store('users', ttl=int(os.getenv('USER_CACHE_TTL', 60)))
+)
+user_cache.listen_for_deactivation()
+
+# Estadísticas de equipos: LRU en memoria delante de team_stats_cache (refresco en segundo plano)
+team_stats_service = TeamStatsService(
+    max_entries=int(os.getenv('TEAM_STATS_CACHE_SIZE', 2048)),
+    ttl=int(os.getenv('TEAM_STATS_CACHE_TTL', 600)),
+    max_age_days=int(os.getenv('TEAM_STATS_MAX_AGE_DAYS', 7))
+)
+
 # User loader para Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return user_cache.load(user_id)
+
+
+def explanation_cache_key(model, prompt):
+    """Clave de caché de una explicación: todo lo que determina la respuesta del modelo"""
+    return make_key('explanation', model, EXPLANATION_SYSTEM_PROMPT, prompt,
+                    EXPLANATION_TEMPERATURE, EXPLANATION_MAX_TOKENS)
+
+
+def find_cached_explanation(prompt):
+    """
+    Busca una explicación en caché para cualquiera de los modelos.
+    Devuelve (explicación o None, claves de caché por modelo).
+    """
+    cache_keys = {model: explanation_cache_key(model, prompt) for model in FALLBACK_MODELS}
+    for model, cache_key in cache_keys.items():
+        cached = explanation_cache.get(cache_key)
+        if cached is not None:
+            current_app.logger.info(f"Explicación servida desde caché ({model})")
+            return cached, cache_keys
+    return None, cache_keys
+
+
+def explanation_payload(model, prompt, stream=False):
+    """Cuerpo de la petición de chat completion a OpenRouter"""
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": EXPLANATION_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": EXPLANATION_TEMPERATURE,
+        "max_tokens": EXPLANATION_MAX_TOKENS
+    }
+    if stream:
+        payload["stream"] = True
+    return payload
+
+
+def clean_explanation(explanation):
+    """Limpiar bloques de código markdown si existen"""
+    explanation = explanation.strip()
+    if explanation.startswith('```html'):
+        explanation = explanation[7:]  # Remover ```html
+    elif explanation.startswith('```'):
+        explanation = explanation[3:]  # Remover ```
+    if explanation.endswith('```'):
+        explanation = explanation[:-3]  # Remover ``` al final
+    return explanation.strip()
+
+
+def generate_explanation(prompt):
+    """
+    Devuelve (explicación, servida desde caché) para un prompt.
+    Lanza LLMBusyError o LLMError si no hay capacidad o ningún modelo responde.
+    """
+    # Buscar una explicación ya generada para exactamente las mismas entradas
+    cached, cache_keys = find_cached_explanation(prompt)
+    if cached is not None:
+        return cached, True
+
+    # La llamada se ejecuta en el event loop del cliente; este hilo solo espera el resultado
+    model, content = llm_client.complete(FALLBACK_MODELS, lambda m: explanation_payload(m, prompt))
+    explanation = clean_explanation(content)
+    if not explanation:
+        raise LLMError(f"Respuesta vacía del modelo {model}")
 
+    current_app.logger.info(f"✅ Respuesta exitosa del modelo {model}")
+    explanation_cache.set(cache_keys[model], explanation)
+    return explanation, False
 
-@app.route('/')
+
+def compute_server_prediction(team1, team2):
+    """
+    Recalcula lambdas y probabilidades BTTS en el servidor con el motor de predicción.
+    Devuelve None si las estadísticas enviadas están incompletas o no son numéricas.
+    """
+    try:
+        return prediction_engine.predict_match(team1.get('stats', {}), team2.get('stats', {}))
+    except (KeyError, TypeError, ValueError):
+        current_app.logger.warning("Estadísticas incompletas, se usan las probabilidades enviadas por el cliente")
+        return None
+
+
+@bp.route('/')
 @login_required
 def index():
     # Verificar si debe mostrar el modal de bienvenida
@@ -72,11 +300,11 @@ def index():
     return render_template('index.html', show_welcome_modal=show_welcome)
 
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register():
     """Registro de nuevos usuarios"""
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
 
     if request.method == 'POST':
         data = request.json if request.is_json else request.form
@@ -110,22 +338,22 @@ def register():
             db.session.add(new_user)
             db.session.commit()
 
-            app.logger.info(f"Nuevo usuario registrado: {username}")
+            current_app.logger.info(f"Nuevo usuario registrado: {username}")
             return jsonify({'success': True, 'message': 'Usuario registrado exitosamente'}), 201
 
         except Exception as e:
             db.session.rollback()
-            app.logger.error(f"Error al registrar usuario: {e}")
+            current_app.logger.error(f"Error al registrar usuario: {e}")
             return jsonify({'error': 'Error al registrar el usuario'}), 500
 
     return render_template('register.html')
 
 
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     """Inicio de sesión"""
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
 
     if request.method == 'POST':
         data = request.json if request.is_json else request.form
@@ -146,11 +374,12 @@ def login():
             login_user(user, remember=False)  # remember=False hace que la sesión expire al cerrar el navegador
             user.last_login = db.func.now()
             db.session.commit()
+            user_cache.on_login(user)
 
             # Marcar que el usuario acaba de iniciar sesión para mostrar el modal de bienvenida
             session['show_welcome_modal'] = True
 
-            app.logger.info(f"Usuario {username} inició sesión")
+            current_app.logger.info(f"Usuario {username} inició sesión")
             return jsonify({
                 'success': True,
                 'message': 'Sesión iniciada correctamente',
@@ -162,63 +391,72 @@ def login():
     return render_template('login.html')
 
 
-@app.route('/logout')
+@bp.route('/logout')
 @login_required
 def logout():
     """Cerrar sesión"""
     username = current_user.username
+    user_cache.on_logout(current_user.id)
     logout_user()
-    app.logger.info(f"Usuario {username} cerró sesión")
-    return redirect(url_for('login'))
+    current_app.logger.info(f"Usuario {username} cerró sesión")
+    return redirect(url_for('main.login'))
 
 
-@app.route('/dashboard')
+@bp.route('/dashboard')
 @login_required
 def dashboard():
     """Dashboard del usuario con historial de predicciones"""
-    predictions = Prediction.query.filter_by(user_id=current_user.id)\
-        .order_by(Prediction.created_at.desc())\
-        .limit(20)\
-        .all()
+    predictions, _ = history.paginate(read_rows(history.history_query(current_user.id, limit=20)), 20)
+    stats = user_stats.summarize(read_row(user_stats.stats_query(current_user.id)))
 
     return render_template('dashboard.html',
                          username=current_user.username,
-                         predictions=predictions)
+                         predictions=predictions,
+                         stats=stats)
 
 
-@app.route('/get_explanation', methods=['POST'])
-def get_explanation():
+def build_explanation_prompt(data):
     """
-    Obtiene la explicación detallada de la predicción utilizando OpenRouter
+    Valida y normaliza los datos de la predicción y construye el prompt para el modelo de IA.
+    Lanza ValueError si falta algún campo requerido.
     """
-    start_time = time.time()
-    try:
-        data = request.json
-        if not data:
-            app.logger.error("No se proporcionaron datos en la solicitud")
-            return jsonify({"error": "No se proporcionaron datos"}), 400
-
-        # Validación de campos requeridos para BTTS
-        required_fields = ['team1', 'team2', 'btts', 'predictionType']
-        for field in required_fields:
-            if field not in data:
-                app.logger.error(f"Falta el campo requerido: {field}")
-                return jsonify({"error": f"Falta el campo requerido: {field}"}), 400
-
-        team1 = data['team1']
-        team2 = data['team2']
-        btts = data['btts']
-
-        # Obtener probabilidades de ambos modelos
-        poisson_prob = btts.get('poisson', 0)
-        logistic_prob = btts.get('logistic', 0)
-        final_prob = btts.get('final', 0)
-        recommended_model = btts.get('recommendedModel', 'Poisson Bivariado')
-        confidence = btts.get('confidence', 'Media')
-        diff_models = btts.get('diffModels', 0)
-
-        # Construir prompt simplificado
-        prompt = f"""
+    # Validación de campos requeridos para BTTS
+    required_fields = ['team1', 'team2', 'btts', 'predictionType']
+    for field in required_fields:
+        if field not in data:
+            current_app.logger.error(f"Falta el campo requerido: {field}")
+            raise ValueError(f"Falta el campo requerido: {field}")
+
+    team1 = data['team1']
+    team2 = data['team2']
+    btts = data['btts']
+
+    # Normalizar estadísticas numéricas para que entradas equivalentes generen el mismo prompt
+    for team in (team1, team2):
+        team['name'] = str(team.get('name', '')).strip()
+        for stat, value in team.get('stats', {}).items():
+            try:
+                team['stats'][stat] = round(float(value), 2)
+            except (TypeError, ValueError):
+                pass
+
+    # Usar los cálculos del servidor en lugar de confiar en los del cliente
+    server_prediction = compute_server_prediction(team1, team2)
+    if server_prediction:
+        team1.update(server_prediction['team1'])
+        team2.update(server_prediction['team2'])
+        btts = server_prediction['btts']
+
+    # Obtener probabilidades de ambos modelos
+    poisson_prob = btts.get('poisson', 0)
+    logistic_prob = btts.get('logistic', 0)
+    final_prob = btts.get('final', 0)
+    recommended_model = btts.get('recommendedModel', 'Poisson Bivariado')
+    confidence = btts.get('confidence', 'Media')
+    diff_models = btts.get('diffModels', 0)
+
+    # Construir prompt simplificado
+    prompt = f"""
 Eres un analista deportivo que explica predicciones BTTS de forma SIMPLE y DIRECTA, como si le explicaras a alguien que nunca ha apostado.
 
 ESTILO:
@@ -306,172 +544,263 @@ LONGITUD:
 ✅ 5 secciones TODAS completas
 ✅ NO cortes antes del final
 ✅ SIEMPRE incluye el mensaje de juego responsable al final"""
+    return prompt
 
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {OPENROUTER_API_KEY}"
-        }
-
-        # Modelos gratuitos de OpenRouter (en orden de preferencia)
-        fallback_models = [
-            "x-ai/grok-4.1-fast:free",  # Intentar primero con Grok
-            "meta-llama/llama-3.2-3b-instruct:free"  # Fallback a Meta Llama
-        ]
-
-        explanation = None
-
-        for model in fallback_models:
-            app.logger.info(f"Probando modelo: {model}")
+@bp.route('/get_explanation', methods=['POST'])
+def get_explanation():
+    """
+    Obtiene la explicación detallada de la predicción utilizando OpenRouter
+    """
+    start_time = time.time()
+    try:
+        data = request.json
+        if not data:
+            current_app.logger.error("No se proporcionaron datos en la solicitud")
+            return jsonify({"error": "No se proporcionaron datos"}), 400
 
-            try:
-                payload = {
-                    "model": model,
-                    "messages": [
-                        {"role": "system", "content": "Eres un analista deportivo que explica predicciones BTTS de forma simple pero completa. Hablas como un amigo que enseña a un principiante. Usas lenguaje claro, sin tecnicismos complejos. Escribes en HTML con estilos inline. Párrafos de 3-4 líneas. Explicas el POR QUÉ de cada número con ejemplos simples. Das contexto a las estadísticas. IMPORTANTE: Siempre incluyes mensaje de juego responsable al final. Respondes COMPLETO en máximo 2500 tokens. NUNCA cortes la respuesta antes de terminar."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.65,
-                    "max_tokens": 2800
-                }
+        try:
+            prompt = build_explanation_prompt(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-                response = requests.post(
-                    OPENROUTER_API_URL,
-                    headers=headers,
-                    json=payload,
-                    timeout=90
-                )
-
-                if response.status_code == 200:
-                    result = response.json()
-                    if 'choices' in result and result['choices']:
-                        explanation = result['choices'][0]['message']['content']
-
-                        # Limpiar bloques de código markdown si existen
-                        explanation = explanation.strip()
-                        if explanation.startswith('```html'):
-                            explanation = explanation[7:]  # Remover ```html
-                        elif explanation.startswith('```'):
-                            explanation = explanation[3:]  # Remover ```
-                        if explanation.endswith('```'):
-                            explanation = explanation[:-3]  # Remover ``` al final
-                        explanation = explanation.strip()
-
-                        app.logger.info(f"✅ Respuesta exitosa del modelo {model}")
-                        break  # Salir del loop, encontramos respuesta
-                    else:
-                        app.logger.warning(f"Respuesta vacía del modelo {model}: {result}")
-                        continue  # Probar siguiente modelo
-
-                elif response.status_code == 429:
-                    app.logger.warning(f"⚠️ Modelo {model} con rate limit (429), probando siguiente...")
-                    continue  # Probar siguiente modelo
-
-                elif response.status_code == 404:
-                    app.logger.warning(f"⚠️ Modelo {model} no existe (404), probando siguiente...")
-                    continue  # Probar siguiente modelo
-
-                elif response.status_code in [502, 503]:
-                    app.logger.warning(f"⚠️ Error del servidor con {model} ({response.status_code}), probando siguiente...")
-                    continue  # Probar siguiente modelo
-
-                else:
-                    app.logger.warning(f"❌ Error con el modelo {model}: {response.status_code} - {response.text}")
-                    continue  # Probar siguiente modelo
-
-            except Exception as e:
-                app.logger.warning(f"❌ Excepción con modelo {model}: {e}")
-                continue  # Probar siguiente modelo
-
-        if not explanation:
-            app.logger.error("❌ Todos los modelos fallaron")
-            return jsonify({
-                "error": "Los modelos de IA están temporalmente ocupados. Por favor, intenta nuevamente en unos segundos."
-            }), 503
+        explanation, cached = generate_explanation(prompt)
 
         elapsed_time = time.time() - start_time
-        app.logger.info(f"Análisis completado en {elapsed_time:.2f}s")
+        current_app.logger.info(f"Análisis completado en {elapsed_time:.2f}s")
 
-        return jsonify({"explanation": explanation})
+        return jsonify({"explanation": explanation, "cached": cached})
 
-    except requests.exceptions.Timeout:
-        app.logger.error("Timeout en la solicitud a OpenRouter")
-        return jsonify({"error": "Timeout en la solicitud a OpenRouter. Intenta nuevamente."}), 504
+    except LLMBusyError:
+        current_app.logger.warning("Límite de llamadas simultáneas a OpenRouter alcanzado")
+        return jsonify({"error": "Hay demasiados análisis en curso. Intenta nuevamente en unos segundos."}), 503
 
-    except requests.exceptions.ConnectionError:
-        app.logger.error("Error de conexión con OpenRouter")
-        return jsonify({"error": "No se pudo conectar a OpenRouter."}), 503
+    except LLMError:
+        current_app.logger.error("❌ Todos los modelos fallaron")
+        return jsonify({
+            "error": "Los modelos de IA están temporalmente ocupados. Por favor, intenta nuevamente en unos segundos."
+        }), 503
 
     except Exception as e:
-        app.logger.error(f"Error inesperado: {e}", exc_info=True)
+        current_app.logger.error(f"Error inesperado: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/generate_chart', methods=['POST'])
+def sse_event(event, data):
+    """Formatea un evento Server-Sent Events con datos JSON"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@bp.route('/get_explanation/stream', methods=['POST'])
+def get_explanation_stream():
+    """
+    Igual que /get_explanation pero reenvía el HTML al navegador a medida que el modelo
+    lo genera (Server-Sent Events). Eventos: 'chunk' con {html}, 'done' con la explicación
+    completa y limpia, y 'error' con {error}.
+    """
+    data = request.json
+    if not data:
+        return jsonify({"error": "No se proporcionaron datos"}), 400
+
+    try:
+        prompt = build_explanation_prompt(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    cached, cache_keys = find_cached_explanation(prompt)
+    if cached is None:
+        try:
+            llm_client.require_api_key()
+        except RuntimeError as e:
+            current_app.logger.error(str(e))
+            return jsonify({"error": str(e)}), 500
+
+    def generate():
+        if cached is not None:
+            yield sse_event('done', {"explanation": cached, "cached": True})
+            return
+
+        start_time = time.time()
+        for model in llm_client.health.ranked(FALLBACK_MODELS):
+            current_app.logger.info(f"Probando modelo (streaming): {model}")
+            parts = []
+
+            try:
+                for content in llm_client.stream(model, explanation_payload(model, prompt, stream=True)):
+                    parts.append(content)
+                    yield sse_event('chunk', {"html": content})
+
+            except LLMBusyError:
+                current_app.logger.warning("Límite de llamadas simultáneas a OpenRouter alcanzado")
+                yield sse_event('error', {"error": "Hay demasiados análisis en curso. Intenta nuevamente en unos segundos."})
+                return
+
+            except LLMError as e:
+                current_app.logger.warning(f"⚠️ {e}")
+                if parts:
+                    # Ya se envió contenido parcial: no se puede cambiar de modelo a mitad de respuesta
+                    yield sse_event('error', {"error": "Se interrumpió la respuesta del modelo de IA. Intenta nuevamente."})
+                    return
+                continue
+
+            explanation = clean_explanation(''.join(parts))
+            if not explanation:
+                current_app.logger.warning(f"Respuesta vacía del modelo {model}")
+                continue
+
+            explanation_cache.set(cache_keys[model], explanation)
+            current_app.logger.info(f"✅ Streaming completado con {model} en {time.time() - start_time:.2f}s")
+            yield sse_event('done', {"explanation": explanation, "cached": False})
+            return
+
+        current_app.logger.error("❌ Todos los modelos fallaron")
+        yield sse_event('error', {
+            "error": "Los modelos de IA están temporalmente ocupados. Por favor, intenta nuevamente en unos segundos."
+        })
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def chart_cache_key(chart_id, fmt):
+    """Clave de caché de un gráfico: el mismo chart_id identifica su PNG y su SVG"""
+    return f"{fmt}-{chart_id}"
+
+
+@bp.route('/generate_chart', methods=['POST'])
 def generate_chart():
+    """
+    Genera (o recupera de caché) el gráfico comparativo de ambos equipos.
+    format: 'png' (por defecto), 'svg' o 'data' (solo series y etiquetas para Chart.js,
+    sin dibujar nada en el servidor).
+    Las imágenes se devuelven en 'chart' en base64, como antes. Si la caché de gráficos es
+    compartida entre workers (CACHE_DIR), se añade 'chart_url' (servida por
+    /chart/<id>.<formato> con ETag) y con "inline": false 'chart' es esa URL.
+    """
     try:
         data = request.json
         team1 = data['team1']
         team2 = data['team2']
-
-        # Crear figura con tema oscuro para coincidir con la UI
-        plt.style.use('dark_background')
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        # Lista expandida de estadísticas para mostrar
-        stats = ['goalsScored', 'goalsConceded', 'possession', 'shotsOnTarget', 'passingAccuracy']
-        labels = ['Goles anotados', 'Goles recibidos', 'Posesión', 'Tiros a puerta', 'Precisión pases']
-
-        x = np.arange(len(labels))
-        width = 0.35
-
-        values1 = [team1['stats'][stat] for stat in stats]
-        values2 = [team2['stats'][stat] for stat in stats]
-
-        # Colores que coinciden con el frontend
-        bars1 = ax.bar(x - width/2, values1, width, label=team1['name'], color='#36a2eb', alpha=0.8)
-        bars2 = ax.bar(x + width/2, values2, width, label=team2['name'], color='#ff6384', alpha=0.8)
-
-        # Añadir valores encima de las barras
-        def add_values_above_bars(bars):
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                        f'{height:.1f}', ha='center', va='bottom', color='white', fontsize=9)
-
-        add_values_above_bars(bars1)
-        add_values_above_bars(bars2)
-
-        ax.set_title('Comparación de Estadísticas', color='white', fontsize=14)
-        ax.set_xticks(x)
-        ax.set_xticklabels(labels, color='white')
-        ax.legend(framealpha=0.8)
-        
-        # Mejoras visuales
-        plt.grid(axis='y', linestyle='--', alpha=0.3)
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['bottom'].set_color('#ffffff')
-        ax.spines['left'].set_color('#ffffff')
-        
-        # Fondo transparente para mejor integración con el tema oscuro de la web
-        fig.patch.set_alpha(0.0)
-        ax.patch.set_alpha(0.1)
-
-        buf = io.BytesIO()
-        fig.tight_layout()
-        plt.savefig(buf, format='png', dpi=100, transparent=True)
-        buf.seek(0)
-        img_data = base64.b64encode(buf.getvalue()).decode('utf-8')
-        plt.close(fig)
-
-        return jsonify({"chart": f"data:image/png;base64,{img_data}"})
+        fmt = data.get('format', charts.FORMAT_PNG)
+        if fmt not in (charts.FORMAT_PNG, charts.FORMAT_SVG, charts.FORMAT_DATA):
+            return jsonify({"error": f"Formato no soportado: {fmt}"}), 400
+
+        values1 = [float(team1['stats'][stat]) for stat in charts.CHART_STATS]
+        values2 = [float(team2['stats'][stat]) for stat in charts.CHART_STATS]
+
+        if fmt == charts.FORMAT_DATA:
+            return jsonify(dict(charts.comparison_chart_data(team1['name'], team2['name'], values1, values2),
+                                format=charts.FORMAT_DATA))
+
+        chart_id = make_key('chart', team1['name'], team2['name'], values1, values2)
+        cache_key = chart_cache_key(chart_id, fmt)
+        image = chart_cache.get(cache_key)
+        cached = image is not None
+        if not cached:
+            image = charts.render_comparison_chart(team1['name'], team2['name'], values1, values2, fmt)
+            chart_cache.set(cache_key, image)
+
+        response = {"chart_id": chart_id, "format": fmt, "cached": cached}
+        # Sin caché compartida la URL solo la sirve este worker: se responde siempre en línea
+        shared = chart_cache.store is not None
+        if shared:
+            response["chart_url"] = url_for('main.get_chart', chart_id=chart_id, fmt=fmt)
+        if shared and not data.get('inline', True):
+            response["chart"] = response["chart_url"]
+        else:
+            encoded = base64.b64encode(image).decode('utf-8')
+            response["chart"] = f"data:{charts.MIMETYPES[fmt]};base64,{encoded}"
+        return jsonify(response)
 
     except Exception as e:
-        app.logger.error(f"Error al generar gráfico: {e}", exc_info=True)
+        current_app.logger.error(f"Error al generar gráfico: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/save_prediction', methods=['POST'])
+@bp.route('/chart/<chart_id>.<fmt>', methods=['GET'])
+def get_chart(chart_id, fmt):
+    """
+    Sirve un gráfico de la caché por su hash. El contenido de un hash nunca cambia,
+    así que navegadores y proxies pueden reutilizarlo (ETag + Cache-Control).
+    """
+    image = chart_cache.get(chart_cache_key(chart_id, fmt)) if fmt in charts.MIMETYPES else None
+    if image is None:
+        return jsonify({"error": "Gráfico no encontrado"}), 404
+
+    response = Response(image, mimetype=charts.MIMETYPES[fmt])
+    response.set_etag(chart_cache_key(chart_id, fmt))
+    response.cache_control.public = True
+    response.cache_control.max_age = CHART_CACHE_TTL
+    return response.make_conditional(request)
+
+
+def prediction_row(user_id, team1, team2, btts):
+    """
+    Fila de la tabla predictions a partir de los datos enviados por el cliente.
+    Los valores se redondean a 2 decimales como las columnas DECIMAL(5, 2).
+    Lanza ValueError si algún campo no cabe en su columna: en modo batched la fila se
+    inserta más tarde y no debe llegar inválida al buffer.
+    """
+    for team in (team1, team2, btts):
+        if not isinstance(team, dict):
+            raise ValueError("team1, team2 y btts deben ser objetos")
+    stats1 = team1.get('stats') or {}
+    stats2 = team2.get('stats') or {}
+    if not isinstance(stats1, dict) or not isinstance(stats2, dict):
+        raise ValueError("Las estadísticas de los equipos deben ser objetos")
+
+    def number(value):
+        try:
+            value = round(float(value), 2)
+        except (TypeError, ValueError):
+            raise ValueError(f"Valor numérico no válido: {value!r}")
+        if not math.isfinite(value) or abs(value) >= 1000:
+            raise ValueError(f"Valor fuera de rango: {value}")
+        return value
+
+    def text(value, field, max_length):
+        if not isinstance(value, str) or not value.strip() or len(value.strip()) > max_length:
+            raise ValueError(f"{field} no válido: {value!r}")
+        return value.strip()
+
+    return {
+        'user_id': user_id,
+        'team1_name': text(team1.get('name', 'Equipo 1'), 'Nombre del equipo 1', 100),
+        'team2_name': text(team2.get('name', 'Equipo 2'), 'Nombre del equipo 2', 100),
+        # Estadísticas Equipo 1
+        'team1_goals_scored': number(stats1.get('goalsScored', 0)),
+        'team1_goals_conceded': number(stats1.get('goalsConceded', 0)),
+        'team1_possession': number(stats1.get('possession', 0)),
+        'team1_shots_on_target': number(stats1.get('shotsOnTarget', 0)),
+        'team1_passing_accuracy': number(stats1.get('passingAccuracy', 0)),
+        # Estadísticas Equipo 2
+        'team2_goals_scored': number(stats2.get('goalsScored', 0)),
+        'team2_goals_conceded': number(stats2.get('goalsConceded', 0)),
+        'team2_possession': number(stats2.get('possession', 0)),
+        'team2_shots_on_target': number(stats2.get('shotsOnTarget', 0)),
+        'team2_passing_accuracy': number(stats2.get('passingAccuracy', 0)),
+        # Resultados
+        'poisson_btts': number(btts.get('poisson', 0)),
+        'logistic_btts': number(btts.get('logistic', 0)),
+        'final_btts': number(btts.get('final', 0)),
+        'recommended_model': text(btts.get('recommendedModel', 'Poisson Bivariado'), 'Modelo recomendado', 50),
+        'confidence_level': text(btts.get('confidence', 'Media'), 'Nivel de confianza', 20),
+        # Hora de la petición (en modo batched la inserción ocurre más tarde)
+        'created_at': datetime.utcnow()
+    }
+
+
+def with_team_stats(team):
+    """Si el cliente solo envía el nombre del equipo, completa sus estadísticas con team_stats_service"""
+    if not isinstance(team, dict) or team.get('stats') or not isinstance(team.get('name'), str):
+        return team
+    try:
+        cached = team_stats_service.get(team['name'])
+    except ValueError:
+        return team
+    return dict(team, stats=cached['team']) if cached else team
+
+
+@bp.route('/save_prediction', methods=['POST'])
 @login_required
 def save_prediction():
     """
@@ -481,90 +810,174 @@ def save_prediction():
         data = request.json
         if not data:
             return jsonify({"error": "No se proporcionaron datos"}), 400
+        if not all(isinstance(data.get(key, {}), dict) for key in ('team1', 'team2', 'btts')):
+            return jsonify({"error": "team1, team2 y btts deben ser objetos"}), 400
 
-        team1 = data.get('team1', {})
-        team2 = data.get('team2', {})
+        team1 = with_team_stats(data.get('team1', {}))
+        team2 = with_team_stats(data.get('team2', {}))
         btts = data.get('btts', {})
 
-        # Crear nueva predicción
-        new_prediction = Prediction(
-            user_id=current_user.id,
-            team1_name=team1.get('name', 'Equipo 1'),
-            team2_name=team2.get('name', 'Equipo 2'),
-            # Estadísticas Equipo 1
-            team1_goals_scored=Decimal(str(team1.get('stats', {}).get('goalsScored', 0))),
-            team1_goals_conceded=Decimal(str(team1.get('stats', {}).get('goalsConceded', 0))),
-            team1_possession=Decimal(str(team1.get('stats', {}).get('possession', 0))),
-            team1_shots_on_target=Decimal(str(team1.get('stats', {}).get('shotsOnTarget', 0))),
-            team1_passing_accuracy=Decimal(str(team1.get('stats', {}).get('passingAccuracy', 0))),
-            # Estadísticas Equipo 2
-            team2_goals_scored=Decimal(str(team2.get('stats', {}).get('goalsScored', 0))),
-            team2_goals_conceded=Decimal(str(team2.get('stats', {}).get('goalsConceded', 0))),
-            team2_possession=Decimal(str(team2.get('stats', {}).get('possession', 0))),
-            team2_shots_on_target=Decimal(str(team2.get('stats', {}).get('shotsOnTarget', 0))),
-            team2_passing_accuracy=Decimal(str(team2.get('stats', {}).get('passingAccuracy', 0))),
-            # Resultados
-            poisson_btts=Decimal(str(btts.get('poisson', 0))),
-            logistic_btts=Decimal(str(btts.get('logistic', 0))),
-            final_btts=Decimal(str(btts.get('final', 0))),
-            recommended_model=btts.get('recommendedModel', 'Poisson Bivariado'),
-            confidence_level=btts.get('confidence', 'Media')
-        )
+        # Calcular los resultados en el servidor a partir de las estadísticas
+        server_prediction = compute_server_prediction(team1, team2)
+        if server_prediction:
+            btts = server_prediction['btts']
 
-        db.session.add(new_prediction)
-        db.session.commit()
+        row = prediction_row(current_user.id, team1, team2, btts)
 
-        app.logger.info(f"Predicción guardada para usuario {current_user.username}: {team1.get('name')} vs {team2.get('name')}")
+        if PREDICTION_WRITE_MODE == MODE_BATCHED:
+            # Write-behind: el hilo de fondo la inserta junto con otras en un INSERT múltiple
+            prediction_writer.add(row)
+            prediction_id = None
+        else:
+            result = db.session.execute(Prediction.__table__.insert(), row)
+            user_stats.record_inserted(db.session.connection(), [row])
+            db.session.commit()
+            prediction_id = result.inserted_primary_key[0]
+        mark_write()
+
+        current_app.logger.info(f"Predicción guardada para usuario {current_user.username}: {row['team1_name']} vs {row['team2_name']}")
 
         return jsonify({
             "success": True,
             "message": "Predicción guardada correctamente",
-            "prediction_id": new_prediction.id
+            "prediction_id": prediction_id,
+            "queued": prediction_id is None
         })
 
+    except ValueError as e:
+        # Fila inválida: no llega a la base de datos ni al buffer de escritura
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Error al guardar predicción: {e}", exc_info=True)
+        current_app.logger.error(f"Error al guardar predicción: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/get_historical', methods=['GET'])
+@bp.route('/get_historical', methods=['GET'])
 @login_required
 def get_historical():
     """
     Obtiene las predicciones históricas del usuario desde la base de datos
     """
     try:
-        predictions = Prediction.query.filter_by(user_id=current_user.id)\
-            .order_by(Prediction.created_at.desc())\
-            .limit(10)\
-            .all()
-
-        predictions_list = []
-        for pred in predictions:
-            predictions_list.append({
-                "id": pred.id,
-                "team1": pred.team1_name,
-                "team2": pred.team2_name,
-                "poisson_btts": float(pred.poisson_btts) if pred.poisson_btts else 0,
-                "logistic_btts": float(pred.logistic_btts) if pred.logistic_btts else 0,
-                "final_btts": float(pred.final_btts) if pred.final_btts else 0,
-                "recommended_model": pred.recommended_model,
-                "confidence_level": pred.confidence_level,
-                "created_at": pred.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            })
+        predictions, _ = history.paginate(read_rows(history.history_query(current_user.id, limit=10)), 10)
+        return jsonify({"predictions": [history.serialize_row(row) for row in predictions]})
 
-        return jsonify({"predictions": predictions_list})
+    except Exception as e:
+        current_app.logger.error(f"Error al obtener predicciones históricas: {e}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/history', methods=['GET'])
+@login_required
+def prediction_history():
+    """
+    Historial paginado del usuario (más recientes primero).
+    Parámetros: limit (1-100), cursor (next_cursor de la página anterior), team (prefijo
+    del nombre de cualquiera de los equipos), from / to (YYYY-MM-DD, inclusive) y
+    confidence (uno o varios niveles separados por comas).
+    """
+    try:
+        limit = request.args.get('limit', history.DEFAULT_PAGE_SIZE, type=int)
+        if not 0 < limit <= history.MAX_PAGE_SIZE:
+            return jsonify({"error": f"limit debe estar entre 1 y {history.MAX_PAGE_SIZE}"}), 400
+
+        date_from = request.args.get('from')
+        date_to = request.args.get('to')
+        confidence = request.args.get('confidence')
+        query = history.history_query(
+            current_user.id,
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            team=request.args.get('team', '').strip() or None,
+            date_from=history.parse_date(date_from) if date_from else None,
+            date_to=history.parse_date(date_to, end=True) if date_to else None,
+            confidence=[level.strip() for level in confidence.split(',')] if confidence else None
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        predictions, next_cursor = history.paginate(read_rows(query), limit)
+        return jsonify({
+            "predictions": [history.serialize_row(row) for row in predictions],
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
+        })
 
     except Exception as e:
-        app.logger.error(f"Error al obtener predicciones históricas: {e}", exc_info=True)
+        current_app.logger.error(f"Error al obtener el historial: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
+@bp.route('/history/stats', methods=['GET'])
+@login_required
+def prediction_stats():
+    """
+    Agregados del historial del usuario: número de predicciones, BTTS medio por modelo y
+    reparto por modelo recomendado y nivel de confianza (mantenidos en user_prediction_stats)
+    """
+    try:
+        return jsonify(user_stats.summarize(read_row(user_stats.stats_query(current_user.id))))
 
+    except Exception as e:
+        current_app.logger.error(f"Error al obtener las estadísticas: {e}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/history/<int:prediction_id>', methods=['DELETE'])
+@login_required
+def delete_prediction(prediction_id):
+    """Borra una predicción del usuario y la descuenta de sus agregados"""
+    try:
+        table = Prediction.__table__
+        # FOR UPDATE: dos borrados simultáneos de la misma fila no la descuentan dos veces
+        row = db.session.execute(
+            select(*[table.c[column] for column in user_stats.SOURCE_COLUMNS])
+            .where(table.c.id == prediction_id, table.c.user_id == current_user.id)
+            .with_for_update()
+        ).mappings().first()
+        if row is None:
+            return jsonify({"error": "Predicción no encontrada"}), 404
+
+        db.session.execute(table.delete().where(table.c.id == prediction_id))
+        user_stats.record_deleted(db.session.connection(), [row])
+        db.session.commit()
+        mark_write()
 
+        return jsonify({"success": True, "prediction_id": prediction_id})
 
-@app.route('/como-funciona', methods=['POST'])
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error al borrar predicción: {e}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/team_stats/<name>', methods=['GET'])
+@login_required
+def get_team_stats(name):
+    """
+    Estadísticas de un equipo por nombre (sin distinguir mayúsculas, acentos ni espacios).
+    'stale' indica que son anteriores a TEAM_STATS_MAX_AGE_DAYS y se están refrescando.
+    Un equipo que aún no está en caché se calcula en segundo plano: responde 202 con
+    status 'pending' y el cliente vuelve a consultar la misma URL.
+    """
+    try:
+        entry = team_stats_service.get(name)
+        if entry is None:
+            if team_stats_service.pending(name):
+                return jsonify({"status": "pending", "retry_after": 1}), 202
+            return jsonify({"error": f"No hay estadísticas para {name}"}), 404
+        return jsonify(entry)
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error al obtener las estadísticas de {name}: {e}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/como-funciona', methods=['POST'])
 def como_funciona():
     """
     Muestra paso a paso cómo se calculó la predicción con los datos ingresados
@@ -580,11 +993,11 @@ def como_funciona():
         return jsonify({"success": True, "redirect": "/proceso-calculo"})
 
     except Exception as e:
-        app.logger.error(f"Error al procesar datos: {e}", exc_info=True)
+        current_app.logger.error(f"Error al procesar datos: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 
-@app.route('/proceso-calculo')
+@bp.route('/proceso-calculo')
 def proceso_calculo():
     """
     Página que muestra el proceso de cálculo paso a paso
@@ -593,232 +1006,380 @@ def proceso_calculo():
 
     if not calculation_data:
         flash('No hay datos de cálculo disponibles', 'warning')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
 
     return render_template('proceso_calculo.html', data=calculation_data)
 
 
-@app.route('/monte_carlo', methods=['POST'])
+MONTE_CARLO_STATS = ['goalsScored', 'goalsConceded', 'possession', 'shotsOnTarget']
+
+
+def parse_monte_carlo_request(data):
+    """
+    Valida los parámetros de una simulación Monte Carlo.
+    Lanza ValueError con un mensaje para el usuario si alguno no es válido.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Se esperaba un objeto JSON con los datos de la simulación')
+    n_simulations = int(data.get('simulations', 1000000))
+    mode = data.get('mode', simulation.MODE_SIMULATION)
+    tolerance = data.get('tolerance')
+    if tolerance is not None:
+        tolerance = float(tolerance)
+    seed = data.get('seed')
+    if seed is not None:
+        seed = int(seed)
+        if seed < 0:
+            raise ValueError('La semilla debe ser un entero no negativo')
+
+    if not 0 < n_simulations <= simulation.MAX_SIMULATIONS:
+        raise ValueError(f"El número de simulaciones debe estar entre 1 y {simulation.MAX_SIMULATIONS}")
+
+    if mode not in (simulation.MODE_SIMULATION, simulation.MODE_EXACT):
+        raise ValueError(f"Modo no soportado: {mode}")
+
+    # Estadísticas que usa simulation.compute_lambdas
+    teams = {}
+    for side in ('team1', 'team2'):
+        team = data.get(side)
+        try:
+            teams[side] = dict(team, **{stat: float(team[stat]) for stat in MONTE_CARLO_STATS})
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Estadísticas inválidas de {side}: se requieren {', '.join(MONTE_CARLO_STATS)}")
+
+    return {
+        'team1': teams['team1'],
+        'team2': teams['team2'],
+        'simulations': n_simulations,
+        'mode': mode,
+        'tolerance': tolerance,
+        'seed': seed
+    }
+
+
+def compute_monte_carlo(params):
+    """
+    Ejecuta (o recupera de caché) la simulación descrita por parse_monte_carlo_request()
+    y devuelve la respuesta con el indicador 'cached'
+    """
+    mode = params['mode']
+    n_simulations = params['simulations']
+    seed = params['seed']
+    tolerance = params['tolerance']
+
+    # Lambdas cuantizadas: se simula con ellas para que la caché sea exacta
+    lambda_team1, lambda_team2 = simulation.quantize_lambdas(
+        *simulation.compute_lambdas(params['team1'], params['team2']),
+        precision=MONTE_CARLO_CACHE_PRECISION
+    )
+    cache_key = make_key('monte_carlo', mode, lambda_team1, lambda_team2, n_simulations, seed, tolerance)
+
+    cached = monte_carlo_cache.get(cache_key)
+    if cached is not None:
+        current_app.logger.info("Monte Carlo servido desde caché")
+        return dict(cached, cached=True)
+
+    if mode == simulation.MODE_EXACT:
+        # Cálculo analítico: mismas estadísticas sin simular
+        current_app.logger.info("Calculando distribución exacta de Poisson")
+        response = simulation.run_exact(lambda_team1, lambda_team2, n_simulations)
+    else:
+        current_app.logger.info(f"Iniciando simulación Monte Carlo con {n_simulations} iteraciones")
+
+        # Simulación vectorizada por lotes en el pool de procesos, con parada temprana opcional
+        response = simulation.run_monte_carlo(lambda_team1, lambda_team2, n_simulations, seed=seed, tolerance=tolerance)
+
+    monte_carlo_cache.set(cache_key, response)
+    btts_probability = response['btts_probability']
+
+    current_app.logger.info(f"Monte Carlo completado: BTTS {btts_probability:.2f}%")
+    return dict(response, cached=False)
+
+
+@bp.route('/monte_carlo', methods=['POST'])
 @login_required
 def monte_carlo_simulation():
     """
     Ejecuta simulación Monte Carlo para predicción BTTS
     """
     try:
-        data = request.get_json()
+        try:
+            params = parse_monte_carlo_request(request.get_json() or {})
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
 
-        # Extraer datos de los equipos
-        team1 = data.get('team1', {})
-        team2 = data.get('team2', {})
-        n_simulations = data.get('simulations', 1000000)
-
-        app.logger.info(f"Iniciando simulación Monte Carlo con {n_simulations} iteraciones")
-
-        # Calcular lambdas (tasa esperada de goles) basado en estadísticas
-        # Lambda = (Goles anotados del equipo * Goles concedidos del rival) / Promedio de liga
-        league_avg_goals = 1.5  # Promedio típico de goles por equipo
-
-        lambda_team1 = (team1['goalsScored'] * team2['goalsConceded']) / league_avg_goals
-        lambda_team2 = (team2['goalsScored'] * team1['goalsConceded']) / league_avg_goals
-
-        # Ajustar lambdas con otros factores (posesión, tiros a puerta)
-        possession_factor_t1 = team1['possession'] / 50  # Normalizado a 50%
-        possession_factor_t2 = team2['possession'] / 50
-
-        shots_factor_t1 = team1['shotsOnTarget'] / 5  # Normalizado a 5 tiros
-        shots_factor_t2 = team2['shotsOnTarget'] / 5
-
-        lambda_team1 *= (possession_factor_t1 * 0.3 + shots_factor_t1 * 0.7)
-        lambda_team2 *= (possession_factor_t2 * 0.3 + shots_factor_t2 * 0.7)
-
-        # Asegurar valores mínimos razonables
-        lambda_team1 = max(0.5, min(4.0, lambda_team1))
-        lambda_team2 = max(0.5, min(4.0, lambda_team2))
-
-        # SIMULACIÓN MONTE CARLO
-        results = {
-            'team1_goals': [],
-            'team2_goals': [],
-            'btts': 0,
-            'scorelines': {},
-            'total_goals_dist': {},
-            'team1_scores': 0,
-            'team2_scores': 0,
-            'over_2_5': 0,
-            'under_2_5': 0
-        }
-
-        np.random.seed(int(time.time()))
-
-        for _ in range(n_simulations):
-            # Generar goles usando distribución de Poisson
-            goals_t1 = np.random.poisson(lambda_team1)
-            goals_t2 = np.random.poisson(lambda_team2)
-
-            results['team1_goals'].append(goals_t1)
-            results['team2_goals'].append(goals_t2)
-
-            # Contar BTTS
-            if goals_t1 > 0 and goals_t2 > 0:
-                results['btts'] += 1
-
-            # Contar marcadores
-            scoreline = f"{goals_t1}-{goals_t2}"
-            results['scorelines'][scoreline] = results['scorelines'].get(scoreline, 0) + 1
-
-            # Distribución de goles totales
-            total_goals = goals_t1 + goals_t2
-            results['total_goals_dist'][total_goals] = results['total_goals_dist'].get(total_goals, 0) + 1
-
-            # Ganadores
-            if goals_t1 > goals_t2:
-                results['team1_scores'] += 1
-            elif goals_t2 > goals_t1:
-                results['team2_scores'] += 1
-
-            # Over/Under 2.5
-            if total_goals > 2.5:
-                results['over_2_5'] += 1
-            else:
-                results['under_2_5'] += 1
-
-        # Calcular probabilidades
-        btts_probability = (results['btts'] / n_simulations) * 100
-        team1_win_prob = (results['team1_scores'] / n_simulations) * 100
-        team2_win_prob = (results['team2_scores'] / n_simulations) * 100
-        draw_prob = ((n_simulations - results['team1_scores'] - results['team2_scores']) / n_simulations) * 100
-        over_2_5_prob = (results['over_2_5'] / n_simulations) * 100
-        under_2_5_prob = (results['under_2_5'] / n_simulations) * 100
-
-        # Top 10 marcadores más probables
-        top_scorelines = sorted(results['scorelines'].items(), key=lambda x: x[1], reverse=True)[:10]
-        top_scorelines_formatted = [
-            {
-                'score': score,
-                'probability': (count / n_simulations) * 100,
-                'count': count
-            }
-            for score, count in top_scorelines
-        ]
-
-        # Distribución de goles totales
-        total_goals_formatted = [
-            {
-                'goals': goals,
-                'probability': (count / n_simulations) * 100,
-                'count': count
-            }
-            for goals, count in sorted(results['total_goals_dist'].items())
-        ]
-
-        # Estadísticas de goles
-        avg_goals_t1 = np.mean(results['team1_goals'])
-        avg_goals_t2 = np.mean(results['team2_goals'])
-        std_goals_t1 = np.std(results['team1_goals'])
-        std_goals_t2 = np.std(results['team2_goals'])
-        avg_total_goals = avg_goals_t1 + avg_goals_t2
-
-        # Intervalos de confianza (95%)
-        btts_std = np.sqrt(btts_probability * (100 - btts_probability) / n_simulations)
-        btts_ci_lower = max(0, btts_probability - 1.96 * btts_std)
-        btts_ci_upper = min(100, btts_probability + 1.96 * btts_std)
-
-        # Análisis de volatilidad
-        total_goals_all = [t1 + t2 for t1, t2 in zip(results['team1_goals'], results['team2_goals'])]
-        volatility = np.std(total_goals_all)
-        cv = volatility / avg_total_goals if avg_total_goals > 0 else 0
-
-        if cv < 0.5:
-            volatility_label = "PREDECIBLE"
-            volatility_icon = "✅"
-            volatility_desc = "Resultados consistentes entre simulaciones"
-        elif cv < 0.8:
-            volatility_label = "MODERADO"
-            volatility_icon = "⚠️"
-            volatility_desc = "Variabilidad media en resultados"
-        else:
-            volatility_label = "IMPREDECIBLE"
-            volatility_icon = "🔥"
-            volatility_desc = "Alta variabilidad en resultados"
-
-        # Respuesta compatible con ambas estructuras (página principal y proceso_calculo)
-        response = {
-            'success': True,
-            'simulations': n_simulations,
-            'lambda_team1': round(lambda_team1, 2),
-            'lambda_team2': round(lambda_team2, 2),
-
-            # Estructura para página principal
-            'btts': {
-                'probability': round(btts_probability, 2),
-                'count': results['btts'],
-                'confidence_interval': {
-                    'lower': round(btts_ci_lower, 2),
-                    'upper': round(btts_ci_upper, 2)
-                }
-            },
-            'results': {
-                'team1_win': round(team1_win_prob, 2),
-                'team2_win': round(team2_win_prob, 2),
-                'draw': round(draw_prob, 2)
-            },
-            'goals': {
-                'team1_avg': round(avg_goals_t1, 2),
-                'team2_avg': round(avg_goals_t2, 2),
-                'team1_std': round(std_goals_t1, 2),
-                'team2_std': round(std_goals_t2, 2),
-                'total_avg': round(avg_total_goals, 2)
-            },
-            'over_under': {
-                'over_2_5': round(over_2_5_prob, 2),
-                'under_2_5': round(under_2_5_prob, 2)
-            },
-            'top_scorelines': top_scorelines_formatted,
-            'total_goals_distribution': total_goals_formatted,
-            'volatility': {
-                'value': round(volatility, 2),
-                'coefficient': round(cv, 2),
-                'label': volatility_label,
-                'icon': volatility_icon,
-                'description': volatility_desc
-            },
-
-            # Estructura alternativa plana (para proceso_calculo.html)
-            'btts_probability': round(btts_probability, 2),
-            'confidence_interval': [round(btts_ci_lower, 2), round(btts_ci_upper, 2)],
-            'team1_win_probability': round(team1_win_prob, 2),
-            'team2_win_probability': round(team2_win_prob, 2),
-            'draw_probability': round(draw_prob, 2),
-            'expected_goals_team1': round(avg_goals_t1, 2),
-            'expected_goals_team2': round(avg_goals_t2, 2),
-            'std_goals_team1': round(std_goals_t1, 2),
-            'std_goals_team2': round(std_goals_t2, 2),
-            'over_2_5_probability': round(over_2_5_prob, 2),
-            'under_2_5_probability': round(under_2_5_prob, 2)
-        }
-
-        app.logger.info(f"Monte Carlo completado: BTTS {btts_probability:.2f}%")
-        return jsonify(response)
+        return jsonify(compute_monte_carlo(params))
 
     except Exception as e:
-        app.logger.error(f"Error en Monte Carlo: {str(e)}")
+        current_app.logger.error(f"Error en Monte Carlo: {str(e)}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 
-@app.errorhandler(404)
+@bp.route('/monte_carlo/cache', methods=['GET'])
+@login_required
+def monte_carlo_cache_stats():
+    """
+    Estadísticas de la caché de resultados Monte Carlo (aciertos, fallos, entradas)
+    """
+    return jsonify(monte_carlo_cache.stats())
+
+
+@bp.route('/internal/status', methods=['GET'])
+def internal_status():
+    """
+    Estado interno para monitorización: salud de los modelos de IA y cachés.
+    Requiere la cabecera X-Internal-Token con INTERNAL_STATUS_TOKEN; si no coincide
+    (o no está configurado) responde 404 para no revelar que la ruta existe.
+    """
+    token = current_app.config.get('INTERNAL_STATUS_TOKEN')
+    provided = request.headers.get('X-Internal-Token', '')
+    if not token or not hmac.compare_digest(provided.encode('utf-8'), token.encode('utf-8')):
+        return jsonify({"error": "Ruta no encontrada"}), 404
+
+    return jsonify({
+        'llm': llm_client.status(),
+        'caches': {
+            'monte_carlo': monte_carlo_cache.stats(),
+            'explanations': explanation_cache.stats(),
+            'charts': chart_cache.stats(),
+            'users': user_cache.cache.stats(),
+            'team_stats': team_stats_service.stats()
+        },
+        'jobs': job_manager.stats(),
+        'prediction_writer': dict(prediction_writer.stats(), mode=PREDICTION_WRITE_MODE),
+        'database': {bind or 'primary': pool_stats(engine) for bind, engine in db.engines.items()}
+    })
+
+
+def submit_job(kind, fn, *args):
+    """Encola un trabajo del usuario actual y responde 202 con la URL para consultarlo"""
+    app = current_app._get_current_object()
+
+    def run_in_app_context(*job_args):
+        # Los trabajos corren en otro hilo: necesitan su propio contexto de aplicación
+        with app.app_context():
+            return fn(*job_args)
+
+    try:
+        job = job_manager.submit(kind, current_user.id, run_in_app_context, *args)
+    except JobLimitError as e:
+        return jsonify({'success': False, 'error': str(e)}), 429
+
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': url_for('main.get_job', job_id=job.id)
+    }), 202
+
+
+@bp.route('/jobs/monte_carlo', methods=['POST'])
+@login_required
+def submit_monte_carlo_job():
+    """
+    Igual que /monte_carlo pero en segundo plano: devuelve un job_id para consultar en /jobs/<job_id>
+    """
+    try:
+        params = parse_monte_carlo_request(request.get_json() or {})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return submit_job('monte_carlo', compute_monte_carlo, params)
+
+
+def explanation_job(prompt):
+    explanation, cached = generate_explanation(prompt)
+    return {"explanation": explanation, "cached": cached}
+
+
+@bp.route('/jobs/explanation', methods=['POST'])
+@login_required
+def submit_explanation_job():
+    """
+    Igual que /get_explanation pero en segundo plano: devuelve un job_id para consultar en /jobs/<job_id>
+    """
+    data = request.json
+    if not data:
+        return jsonify({"error": "No se proporcionaron datos"}), 400
+
+    try:
+        prompt = build_explanation_prompt(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return submit_job('explanation', explanation_job, prompt)
+
+
+@bp.route('/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    """
+    Estado y resultado de un trabajo del usuario actual.
+    Con ?wait=N espera hasta N segundos (máximo JOB_MAX_WAIT) a que termine.
+    """
+    job = job_manager.get(job_id, user_id=current_user.id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+
+    wait = request.args.get('wait', 0, type=float)
+    if wait > 0 and job.active:
+        job.wait(min(wait, JOB_MAX_WAIT))
+
+    return jsonify(job.to_dict())
+
+
+@bp.route('/predict_batch', methods=['POST'])
+@login_required
+def predict_batch():
+    """
+    Calcula lambdas, BTTS, 1X2 y Over/Under 2.5 para muchos partidos en una sola pasada vectorizada.
+    Con "save": true guarda todas las predicciones con un único INSERT múltiple.
+    """
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('matches'), list) or not data['matches']:
+            return jsonify({"error": "Se requiere una lista 'matches' con al menos un partido"}), 400
+
+        matches = data['matches']
+        if len(matches) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Máximo {MAX_BATCH_SIZE} partidos por petición"}), 400
+
+        for i, match in enumerate(matches):
+            for side in ('team1', 'team2'):
+                team = match.get(side) if isinstance(match, dict) else None
+                if not isinstance(team, dict) or not isinstance(team.get('name', ''), str):
+                    return jsonify({"error": f"Estadísticas inválidas en el partido {i} ({side})"}), 400
+
+        # Estadísticas por equipo: un array por estadística con un valor por partido
+        # (se aceptan las estadísticas en la raíz del equipo o dentro de 'stats')
+        stat_names = prediction_engine.REQUIRED_STATS + prediction_engine.OPTIONAL_STATS
+        stats = {}
+        for side in ('team1', 'team2'):
+            rows = []
+            for i, match in enumerate(matches):
+                team = match[side]
+                team_stats = team.get('stats', team)
+                try:
+                    rows.append([float(team_stats[stat]) if stat in prediction_engine.REQUIRED_STATS
+                                 else float(team_stats.get(stat, 0)) for stat in stat_names])
+                except (KeyError, TypeError, ValueError, AttributeError):
+                    return jsonify({"error": f"Estadísticas inválidas en el partido {i} ({side})"}), 400
+            stats[side] = dict(zip(stat_names, np.array(rows).T))
+
+        # Modelos BTTS (Poisson Bivariado + Regresión Logística), igual que en el navegador
+        models = prediction_engine.predict(stats['team1'], stats['team2'])
+
+        # 1X2 y Over/Under con las lambdas de la simulación Monte Carlo
+        lambda_team1, lambda_team2 = simulation.compute_lambdas(stats['team1'], stats['team2'])
+        team1_win, draw, team2_win = (p * 100 for p in poisson_tables.outcome_probabilities(lambda_team1, lambda_team2))
+        over_2_5 = poisson_tables.over_probability(lambda_team1, lambda_team2) * 100
+
+        predictions = []
+        for i, match in enumerate(matches):
+            predictions.append({
+                'team1': match['team1'].get('name', 'Equipo 1'),
+                'team2': match['team2'].get('name', 'Equipo 2'),
+                'lambda_team1': round(float(lambda_team1[i]), 2),
+                'lambda_team2': round(float(lambda_team2[i]), 2),
+                'btts': {
+                    'poisson': round(float(models['poisson'][i]), 2),
+                    'logistic': round(float(models['logistic'][i]), 2),
+                    'final': round(float(models['final'][i]), 2),
+                    'recommendedModel': str(models['recommended_model'][i]),
+                    'confidence': str(models['confidence'][i])
+                },
+                'results': {
+                    'team1_win': round(float(team1_win[i]), 2),
+                    'team2_win': round(float(team2_win[i]), 2),
+                    'draw': round(float(draw[i]), 2)
+                },
+                'over_under': {
+                    'over_2_5': round(float(over_2_5[i]), 2),
+                    'under_2_5': round(100 - float(over_2_5[i]), 2)
+                }
+            })
+
+        saved = 0
+        if data.get('save'):
+            rows = []
+            for i, prediction in enumerate(predictions):
+                row = {
+                    'user_id': current_user.id,
+                    'team1_name': prediction['team1'],
+                    'team2_name': prediction['team2'],
+                    'poisson_btts': prediction['btts']['poisson'],
+                    'logistic_btts': prediction['btts']['logistic'],
+                    'final_btts': prediction['btts']['final'],
+                    'recommended_model': prediction['btts']['recommendedModel'],
+                    'confidence_level': prediction['btts']['confidence']
+                }
+                for side in ('team1', 'team2'):
+                    for stat, column in zip(prediction_engine.REQUIRED_STATS,
+                                            ['goals_scored', 'goals_conceded', 'possession',
+                                             'shots_on_target', 'passing_accuracy']):
+                        row[f"{side}_{column}"] = round(float(stats[side][stat][i]), 2)
+                rows.append(row)
+
+            # Un único INSERT con todas las filas (executemany)
+            db.session.execute(Prediction.__table__.insert(), rows)
+            user_stats.record_inserted(db.session.connection(), rows)
+            db.session.commit()
+            mark_write()
+            saved = len(rows)
+            current_app.logger.info(f"{saved} predicciones guardadas en lote para usuario {current_user.username}")
+
+        return jsonify({"success": True, "count": len(predictions), "saved": saved, "predictions": predictions})
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error en predicción por lotes: {e}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.app_errorhandler(404)
 def page_not_found(e):
     return jsonify({"error": "Ruta no encontrada"}), 404
 
 
-@app.errorhandler(500)
+@bp.app_errorhandler(500)
 def internal_server_error(e):
     return jsonify({"error": "Error interno del servidor"}), 500
 
 
+def create_app(config=None):
+    """
+    Crea y configura la aplicación Flask. config (dict) sobrescribe la configuración
+    leída del entorno, p. ej. create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'}).
+    """
+    app = Flask(__name__)
+    app.config.update(default_config())
+    if config:
+        app.config.update(config)
+    # Opciones del pool según la URI final (la de config puede no ser MySQL)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+
+    # Inicializar extensiones
+    db.init_app(app)
+    bcrypt.init_app(app)
+    login_manager.init_app(app)
+
+    app.register_blueprint(bp)
+
+    prediction_writer.init_app(app, db)
+    team_stats_service.init_app(app)
+    job_manager.store.init_app(app)
+
+    if not llm_client.configured:
+        app.logger.warning("OPENROUTER_API_KEY no está definida: las explicaciones de IA no estarán disponibles")
+    return app
+
+
 if __name__ == '__main__':
+    app = create_app()
+
     # Crear tablas en la base de datos si no existen
     with app.app_context():
         try:
@@ -829,4 +1390,4 @@ if __name__ == '__main__':
 
     port = int(os.environ.get("PORT", 5000))
     app.logger.info(f"Iniciando servidor en puerto {port}")
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port, debug=True)
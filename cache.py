@@ -0,0 +1,237 @@
+"""
+Cachés de Goal2Goal
+Caché LRU en memoria con expiración (TTL), contadores de aciertos/fallos
+y un segundo nivel opcional en disco compartido entre workers del mismo host
+"""
+
+import os
+import json
+import time
+import pickle
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def make_key(*parts):
+    """Genera una clave estable (SHA-256) a partir de valores serializables en JSON"""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class FileStore:
+    """
+    Almacén en disco: un archivo por clave dentro de un directorio.
+    Lo comparten todos los workers de gunicorn que apunten al mismo directorio.
+    La caducidad va dentro del archivo ({'expires_at', 'value'}), así que el TTL cuenta desde
+    la escritura aunque el valor se lea a menudo. Con max_entries/max_bytes se borran los
+    archivos usados hace más tiempo (cada lectura actualiza su fecha de modificación) al
+    superar el límite; la comprobación recorre el directorio, así que se hace como mucho una
+    vez cada prune_interval segundos.
+    """
+
+    def __init__(self, directory, ttl=3600, max_entries=None, max_bytes=None, prune_interval=30):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.prune_interval = prune_interval
+        self._last_prune = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+            if not isinstance(entry, dict) or entry.keys() != {'expires_at', 'value'}:
+                # Formato anterior, sin caducidad guardada
+                os.remove(path)
+                return None
+            if entry['expires_at'] is not None and entry['expires_at'] < time.time():
+                os.remove(path)
+                return None
+            if self.max_entries or self.max_bytes:
+                # Orden LRU para prune() (la caducidad no depende de la fecha del archivo)
+                os.utime(path)
+            return entry['value']
+        except (OSError, pickle.PickleError, EOFError):
+            return None
+
+    def set(self, key, value):
+        entry = {'expires_at': time.time() + self.ttl if self.ttl else None, 'value': value}
+        # Escritura atómica: archivo temporal + os.replace
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            return
+        self._maybe_prune()
+
+    def _maybe_prune(self):
+        if not (self.max_entries or self.max_bytes or self.ttl):
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_prune < self.prune_interval:
+                return
+            self._last_prune = now
+        self.prune()
+
+    def prune(self):
+        """Borra los archivos caducados y, si se supera el límite, los usados hace más tiempo"""
+        files = []
+        now = time.time()
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith('.pkl'):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    # Sin leer el archivo: si no se ha usado en ttl segundos, se escribió antes
+                    if self.ttl and now - stat.st_mtime > self.ttl:
+                        self.delete(entry.name[:-4])
+                    else:
+                        files.append((stat.st_mtime, stat.st_size, entry.name[:-4]))
+        except OSError:
+            return
+
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, key in files:
+            over_entries = self.max_entries and len(files) - removed > self.max_entries
+            over_bytes = self.max_bytes and total > self.max_bytes
+            if not (over_entries or over_bytes):
+                break
+            self.delete(key)
+            removed += 1
+            total -= size
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.pkl'):
+                self.delete(name[:-4])
+
+
+def shared_store(namespace, ttl=3600, max_entries=None, max_bytes=None):
+    """
+    Devuelve el segundo nivel compartido para un espacio de nombres si CACHE_DIR
+    está definido en el entorno; si no, None (solo caché en memoria)
+    """
+    cache_dir = os.getenv('CACHE_DIR')
+    if not cache_dir:
+        return None
+    return FileStore(os.path.join(cache_dir, namespace), ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
+
+
+class TTLCache:
+    """
+    Caché LRU acotada por número de entradas, con expiración por tiempo.
+    Con max_bytes también se acota por tamaño total (valores bytes/str, medidos con len()).
+    Si se indica store, se consulta como segundo nivel en los fallos de memoria.
+    """
+
+    def __init__(self, max_entries=512, ttl=3600, store=None, max_bytes=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.store = store
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Devuelve el valor guardado o None si no existe o ha expirado"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._discard(key)
+
+        if self.store is not None:
+            value = self.store.get(key)
+            if value is not None:
+                self._set_local(key, value)
+                with self._lock:
+                    self.hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _sizeof(self, value):
+        return len(value) if self.max_bytes else 0
+
+    def _discard(self, key):
+        """Elimina una entrada de memoria actualizando el tamaño (con el lock tomado)"""
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.size -= self._sizeof(entry[1])
+
+    def _set_local(self, key, value):
+        with self._lock:
+            self._discard(key)
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self.size += self._sizeof(value)
+            while len(self._data) > self.max_entries or (self.max_bytes and self.size > self.max_bytes):
+                self._discard(next(iter(self._data)))
+
+    def set(self, key, value):
+        """Guarda un valor en memoria y, si existe, en el segundo nivel"""
+        self._set_local(key, value)
+        if self.store is not None:
+            self.store.set(key, value)
+
+    def delete(self, key):
+        with self._lock:
+            self._discard(key)
+        if self.store is not None:
+            self.store.delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self):
+        """Contadores de uso para monitorización"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'max_entries': self.max_entries,
+                'bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'shared': self.store is not None
+            }
@@ -0,0 +1,155 @@
+"""
+Gráficos de Goal2Goal
+Plantilla del gráfico comparativo construida una sola vez por hilo con la API orientada
+a objetos de matplotlib (Figure + FigureCanvasAgg, sin pyplot ni estado global).
+En cada petición solo se actualizan las alturas de las barras, los valores y la leyenda.
+Formatos: PNG, SVG (texto como texto, más ligero) o solo los datos para Chart.js en el cliente.
+"""
+
+import io
+import threading
+
+import numpy as np
+from matplotlib import rc_context, style
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# Estadísticas y etiquetas del gráfico comparativo
+CHART_STATS = ['goalsScored', 'goalsConceded', 'possession', 'shotsOnTarget', 'passingAccuracy']
+CHART_LABELS = ['Goles anotados', 'Goles recibidos', 'Posesión', 'Tiros a puerta', 'Precisión pases']
+
+# Colores que coinciden con el frontend
+TEAM1_COLOR = '#36a2eb'
+TEAM2_COLOR = '#ff6384'
+
+BAR_WIDTH = 0.35
+LABEL_OFFSET = 0.1
+DPI = 100
+
+FORMAT_PNG = 'png'
+FORMAT_SVG = 'svg'
+FORMAT_DATA = 'data'
+MIMETYPES = {FORMAT_PNG: 'image/png', FORMAT_SVG: 'image/svg+xml'}
+
+# rcParams son globales: la construcción (estilo dark_background) y la exportación SVG
+# (svg.fonttype) los modifican con rc_context, así que comparten un único lock para que
+# los valores de un hilo no se cuelen en la figura o el archivo de otro
+_rc_lock = threading.Lock()
+_local = threading.local()
+
+
+class ComparisonChart:
+    """Figura del gráfico comparativo ya estilizada, reutilizable entre peticiones"""
+
+    def __init__(self):
+        with _rc_lock, rc_context(style.library['dark_background']):
+            self.figure = Figure(figsize=(10, 6), dpi=DPI)
+            self.canvas = FigureCanvasAgg(self.figure)
+            ax = self.figure.add_subplot()
+            self.ax = ax
+
+            x = np.arange(len(CHART_LABELS))
+            zeros = np.zeros(len(CHART_LABELS))
+            self.bars1 = ax.bar(x - BAR_WIDTH/2, zeros, BAR_WIDTH, label=' ', color=TEAM1_COLOR, alpha=0.8)
+            self.bars2 = ax.bar(x + BAR_WIDTH/2, zeros, BAR_WIDTH, label=' ', color=TEAM2_COLOR, alpha=0.8)
+
+            # Textos de valores encima de las barras (se reposicionan en cada render)
+            self.labels1 = [self._value_label(bar) for bar in self.bars1]
+            self.labels2 = [self._value_label(bar) for bar in self.bars2]
+
+            ax.set_title('Comparación de Estadísticas', color='white', fontsize=14)
+            ax.set_xticks(x)
+            ax.set_xticklabels(CHART_LABELS, color='white')
+            self.legend = ax.legend(framealpha=0.8)
+
+            # Mejoras visuales
+            ax.grid(axis='y', linestyle='--', alpha=0.3)
+            ax.spines['top'].set_visible(False)
+            ax.spines['right'].set_visible(False)
+            ax.spines['bottom'].set_color('#ffffff')
+            ax.spines['left'].set_color('#ffffff')
+
+            # Fondo transparente para mejor integración con el tema oscuro de la web
+            # (equivale al savefig(transparent=True) anterior, sin modificarlo en cada render)
+            self.figure.patch.set_alpha(0.0)
+            ax.patch.set_alpha(0.0)
+
+            ax.set_ylim(0, 100)
+            self.figure.tight_layout()
+
+    def _value_label(self, bar):
+        return self.ax.text(bar.get_x() + bar.get_width()/2., LABEL_OFFSET, '',
+                            ha='center', va='bottom', color='white', fontsize=9)
+
+    @staticmethod
+    def _update_series(bars, labels, values):
+        for bar, label, value in zip(bars, labels, values):
+            bar.set_height(value)
+            label.set_y(value + LABEL_OFFSET)
+            label.set_text(f'{value:.1f}')
+
+    def render(self, name1, name2, values1, values2, fmt=FORMAT_PNG):
+        """Actualiza la plantilla con los datos de un partido y devuelve la imagen (PNG o SVG) en bytes"""
+        self._update_series(self.bars1, self.labels1, values1)
+        self._update_series(self.bars2, self.labels2, values2)
+
+        legend_texts = self.legend.get_texts()
+        legend_texts[0].set_text(name1)
+        legend_texts[1].set_text(name2)
+
+        # Margen superior para que los valores no se salgan del área del gráfico
+        top = max(max(values1), max(values2), 1.0)
+        self.ax.set_ylim(0, top * 1.12)
+
+        buf = io.BytesIO()
+        if fmt == FORMAT_SVG:
+            # Colores de fondo explícitos: no dependen de savefig.* en rcParams
+            with _rc_lock, rc_context({'svg.fonttype': 'none'}):
+                self.figure.savefig(buf, format='svg', facecolor='auto', edgecolor='auto', transparent=False)
+        else:
+            self.canvas.print_png(buf)
+        return buf.getvalue()
+
+
+def get_comparison_chart():
+    """Plantilla del hilo actual (se construye en el primer uso)"""
+    chart = getattr(_local, 'comparison_chart', None)
+    if chart is None:
+        chart = _local.comparison_chart = ComparisonChart()
+    return chart
+
+
+def render_comparison_chart(name1, name2, values1, values2, fmt=FORMAT_PNG):
+    """Dibuja el gráfico de barras comparativo y devuelve la imagen en bytes"""
+    return get_comparison_chart().render(name1, name2, values1, values2, fmt)
+
+
+def _rgba(color, alpha):
+    """'#36a2eb', 0.7 -> 'rgba(54, 162, 235, 0.7)'"""
+    red, green, blue = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+    return f"rgba({red}, {green}, {blue}, {alpha})"
+
+
+def _chart_dataset(name, values, color):
+    # Mismas opciones que los datasets de createComparisonChart (static/js/script.js)
+    return {
+        'label': name,
+        'data': list(values),
+        'backgroundColor': _rgba(color, 0.7),
+        'borderColor': _rgba(color, 1),
+        'borderWidth': 1
+    }
+
+
+def comparison_chart_data(name1, name2, values1, values2):
+    """
+    Objeto 'data' de Chart.js listo para new Chart(ctx, {type: 'bar', data}): las mismas
+    etiquetas, series y colores que construye createComparisonChart en el navegador
+    """
+    return {
+        'labels': CHART_LABELS,
+        'datasets': [
+            _chart_dataset(name1, values1, TEAM1_COLOR),
+            _chart_dataset(name2, values2, TEAM2_COLOR)
+        ]
+    }
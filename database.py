@@ -0,0 +1,102 @@
+"""
+Conexiones a MySQL de Goal2Goal
+Opciones del pool de SQLAlchemy leídas del entorno, un QueuePool que mide la espera
+al obtener conexiones y las URIs de la base principal y de la réplica de lectura opcional.
+"""
+
+import os
+import time
+import threading
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+def mysql_uri(host, port):
+    """URI de PyMySQL con el usuario, contraseña y base de datos del entorno"""
+    return (
+        f"mysql+pymysql://{os.getenv('MYSQL_USER', 'root')}:"
+        f"{os.getenv('MYSQL_PASSWORD', '')}@"
+        f"{host}:{port}/"
+        f"{os.getenv('MYSQL_DATABASE', 'goal2goal_db')}"
+    )
+
+
+def primary_uri():
+    return mysql_uri(os.getenv('MYSQL_HOST', 'localhost'), os.getenv('MYSQL_PORT', '3306'))
+
+
+def replica_uri():
+    """URI de la réplica de lectura, o None si MYSQL_REPLICA_HOST no está definido"""
+    host = os.getenv('MYSQL_REPLICA_HOST')
+    if not host:
+        return None
+    return mysql_uri(host, os.getenv('MYSQL_REPLICA_PORT', os.getenv('MYSQL_PORT', '3306')))
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que registra cuánto esperan las peticiones para obtener una conexión"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._stats_lock = threading.Lock()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self.checkouts += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+
+
+def engine_options(uri):
+    """
+    Opciones de create_engine (SQLALCHEMY_ENGINE_OPTIONS) para la URI dada. El pool
+    ajustable solo se aplica a MySQL: otros motores (p. ej. SQLite en pruebas) usan el suyo.
+    """
+    if make_url(uri).get_backend_name() != 'mysql':
+        return {}
+    return {
+        'poolclass': TimedQueuePool,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        # Reciclar antes del wait_timeout de MySQL evita "MySQL server has gone away"
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 280)),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', '1').lower() in ('1', 'true', 'yes')
+    }
+
+
+def pool_stats(engine):
+    """Métricas del pool de un engine para monitorización"""
+    pool = engine.pool
+    stats = {'pool': type(pool).__name__, 'status': pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow()
+        })
+    if isinstance(pool, TimedQueuePool):
+        with pool._stats_lock:
+            stats.update({
+                'checkouts': pool.checkouts,
+                'timeouts': pool.timeouts,
+                'avg_wait_ms': round(pool.total_wait / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+                'max_wait_ms': round(pool.max_wait * 1000, 3)
+            })
+    return stats
@@ -52,10 +52,81 @@ CREATE TABLE IF NOT EXISTS predictions (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-    INDEX idx_user_id (user_id),
+    INDEX idx_user_created_id (user_id, created_at, id),
+    INDEX idx_user_team1 (user_id, team1_name),
+    INDEX idx_user_team2 (user_id, team2_name),
     INDEX idx_created_at (created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Agregados por usuario (se actualizan con cada INSERT/DELETE en predictions)
+CREATE TABLE IF NOT EXISTS user_prediction_stats (
+    user_id INT PRIMARY KEY,
+    prediction_count INT NOT NULL DEFAULT 0,
+
+    -- Sumas de probabilidades BTTS (media = suma / prediction_count)
+    poisson_btts_sum DECIMAL(14,2) NOT NULL DEFAULT 0,
+    logistic_btts_sum DECIMAL(14,2) NOT NULL DEFAULT 0,
+    final_btts_sum DECIMAL(14,2) NOT NULL DEFAULT 0,
+
+    -- Reparto por modelo recomendado
+    model_consensus INT NOT NULL DEFAULT 0,
+    model_poisson INT NOT NULL DEFAULT 0,
+    model_logistic INT NOT NULL DEFAULT 0,
+    model_other INT NOT NULL DEFAULT 0,
+
+    -- Reparto por nivel de confianza
+    confidence_high INT NOT NULL DEFAULT 0,
+    confidence_medium INT NOT NULL DEFAULT 0,
+    confidence_low INT NOT NULL DEFAULT 0,
+    confidence_other INT NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Estadísticas de equipos (caché con refresco en segundo plano, ver team_stats.py)
+CREATE TABLE IF NOT EXISTS team_stats_cache (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    team_name VARCHAR(100) NOT NULL UNIQUE,
+    team_name_normalized VARCHAR(100),
+
+    -- Estadísticas
+    goals_scored DECIMAL(5,2),
+    goals_conceded DECIMAL(5,2),
+    possession DECIMAL(5,2),
+    shots_on_target DECIMAL(5,2),
+    passing_accuracy DECIMAL(5,2),
+    fouls DECIMAL(5,2),
+    corners DECIMAL(5,2),
+    yellow_cards DECIMAL(5,2),
+    red_cards DECIMAL(5,2),
+
+    -- Metadata ('FBref', 'SofaScore', 'Estimated')
+    source VARCHAR(50),
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    INDEX idx_team_name_normalized (team_name_normalized),
+    INDEX idx_last_updated (last_updated)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Tabla de trabajos en segundo plano (estado compartido entre workers de gunicorn)
+CREATE TABLE IF NOT EXISTS background_jobs (
+    id VARCHAR(32) PRIMARY KEY,
+    kind VARCHAR(30) NOT NULL,
+    user_id INT NOT NULL,
+    status VARCHAR(10) NOT NULL,
+    result MEDIUMTEXT,
+    error TEXT,
+    -- Marcas de tiempo Unix
+    created_at DOUBLE NOT NULL,
+    started_at DOUBLE,
+    finished_at DOUBLE,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX idx_user_status (user_id, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Insertar usuario de prueba (password: admin123)
 -- Hash bcrypt de 'admin123'
 INSERT INTO users (username, email, password_hash) VALUES
@@ -0,0 +1,140 @@
+"""
+Revisión de planes de consulta de Goal2Goal
+Ejecuta EXPLAIN en MySQL sobre cada SELECT que lanza la aplicación y marca los planes
+que no escalan: recorrido completo de tabla, consulta sin índice, filesort o tabla
+temporal, o un índice distinto del esperado. Sale con código 1 si alguno falla, para
+usarlo antes de desplegar cambios de esquema o de consultas:
+
+    python explain_queries.py [--user-id N]
+
+Conviene ejecutarlo contra una copia con volumen real: con tablas casi vacías MySQL
+puede preferir un recorrido completo aunque exista el índice.
+"""
+
+import sys
+import argparse
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, select, func
+
+from database import primary_uri
+from models import User, Prediction, BackgroundJob
+import jobs
+import history
+import user_stats
+import team_stats
+
+HISTORY_INDEX = 'idx_user_created_id'
+
+
+def app_queries(user_id):
+    """
+    (nombre, SELECT, índice esperado o None, filesort permitido) de cada consulta de la app.
+    Al añadir una consulta nueva a la aplicación, añadirla también aquí.
+    """
+    now = datetime.utcnow()
+    next_page = history.encode_cursor(now - timedelta(days=1), 2 ** 31 - 1)
+    return [
+        ('load_user', select(User).where(User.id == user_id), 'PRIMARY', False),
+        ('login / registro por usuario', select(User).where(User.username == 'admin').limit(1), None, False),
+        ('registro por email', select(User).where(User.email == 'admin@goal2goal.com').limit(1), None, False),
+        ('dashboard', history.history_query(user_id, limit=20), HISTORY_INDEX, False),
+        ('dashboard / /history/stats', user_stats.stats_query(user_id), 'PRIMARY', False),
+        ('/get_historical', history.history_query(user_id, limit=10), HISTORY_INDEX, False),
+        ('/history página siguiente', history.history_query(user_id, cursor=next_page), HISTORY_INDEX, False),
+        ('/history por fechas',
+         history.history_query(user_id, date_from=now - timedelta(days=30), date_to=now), HISTORY_INDEX, False),
+        ('/history por confianza',
+         history.history_query(user_id, confidence=['Alta', 'Media']), HISTORY_INDEX, False),
+        # Según la selectividad MySQL recorre el historial en orden o une idx_user_team1/2
+        # (index_merge) y ordena el resultado, que ya es pequeño
+        ('/history por equipo', history.history_query(user_id, team='Real'), None, True),
+        ('borrar predicción',
+         select(Prediction.user_id).where(Prediction.id == 1, Prediction.user_id == user_id), 'PRIMARY', False),
+        ('/team_stats', team_stats.lookup_query(team_stats.normalize_name('Real Madrid')), None, False),
+        # Rango de created_at en cada lado de la unión (refresco en segundo plano)
+        ('estimación de team_stats',
+         team_stats.estimate_query('Real Madrid', now - timedelta(days=team_stats.ESTIMATE_WINDOW_DAYS)),
+         None, False),
+        ('límite de trabajos por usuario',
+         select(func.count()).select_from(BackgroundJob).where(
+             BackgroundJob.user_id == user_id,
+             BackgroundJob.status.in_([jobs.STATUS_QUEUED, jobs.STATUS_RUNNING])),
+         'idx_user_status', False),
+        ('/jobs/<id>', select(BackgroundJob).where(BackgroundJob.id == 'x'), 'PRIMARY', False),
+    ]
+
+
+def explain(connection, statement):
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={'render_postcompile': True})
+    params = compiled.params
+    if compiled.positiontup is not None:
+        # PyMySQL usa parámetros posicionales (%s)
+        params = tuple(params[name] for name in compiled.positiontup)
+    result = connection.exec_driver_sql(f"EXPLAIN {compiled}", params)
+    return [dict(row._mapping) for row in result]
+
+
+def plan_problems(plan, expected_index, allow_filesort):
+    problems = []
+    for step in plan:
+        table = step.get('table') or ''
+        extra = step.get('Extra') or ''
+        if table.startswith('<'):
+            # Tablas derivadas (<derived2>, <union2,3>): ya son el resultado filtrado
+            continue
+        if step.get('type') == 'ALL':
+            problems.append(f"recorrido completo de {table}")
+        elif not step.get('key'):
+            problems.append(f"{table} sin índice")
+        elif expected_index and step['key'] != expected_index:
+            problems.append(f"{table} usa {step['key']} en lugar de {expected_index}")
+        if 'Using filesort' in extra and not allow_filesort:
+            problems.append(f"filesort en {table}")
+        if 'Using temporary' in extra:
+            problems.append(f"tabla temporal en {table}")
+    return problems
+
+
+def default_user_id(connection):
+    """El usuario con más predicciones: su historial es el caso más exigente"""
+    user_id = connection.execute(
+        select(Prediction.user_id).group_by(Prediction.user_id).order_by(func.count().desc()).limit(1)
+    ).scalar()
+    return user_id or 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN de las consultas de Goal2Goal")
+    parser.add_argument('--user-id', type=int, help="usuario de ejemplo (por defecto el de más predicciones)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    engine = create_engine(primary_uri())
+    failures = 0
+
+    with engine.connect() as connection:
+        user_id = args.user_id or default_user_id(connection)
+        print(f"🔍 Planes de consulta para user_id={user_id}\n")
+        print(f"{'Consulta':<30}{'type':<14}{'key':<28}{'rows':>10}  Extra")
+
+        for name, statement, expected_index, allow_filesort in app_queries(user_id):
+            plan = explain(connection, statement)
+            for step in plan:
+                print(f"{name:<30}{step.get('type') or '-':<14}{step.get('key') or '-':<28}"
+                      f"{step.get('rows') or 0:>10}  {step.get('Extra') or ''}")
+                name = ''
+            for problem in plan_problems(plan, expected_index, allow_filesort):
+                print(f"   ❌ {problem}")
+                failures += 1
+
+    if failures:
+        print(f"\n❌ {failures} problemas en los planes de consulta")
+        return 1
+    print("\n✅ Todas las consultas usan índice")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Configuración de gunicorn para Goal2Goal
+Perfiles de despliegue seleccionados con GUNICORN_PROFILE; cada ajuste se puede
+sobrescribir con su variable de entorno sin tocar código:
+
+    gunicorn -c gunicorn.conf.py "app:create_app()"
+
+Perfiles:
+  gthread (por defecto): hilos por worker para la parte de E/S (OpenRouter, SSE, MySQL)
+  sync:                  un hilo por worker, para cargas sobre todo de CPU (Monte Carlo)
+  dev:                   un worker con recarga automática
+"""
+
+import os
+import multiprocessing
+
+CPU_COUNT = multiprocessing.cpu_count()
+
+PROFILES = {
+    'gthread': {
+        'worker_class': 'gthread',
+        'workers': CPU_COUNT + 1,
+        'threads': 8,
+        'preload_app': True,
+        'max_requests': 1000,
+        'max_requests_jitter': 100,
+        'timeout': 120,
+        'graceful_timeout': 30,
+        'keepalive': 5
+    },
+    'sync': {
+        'worker_class': 'sync',
+        'workers': CPU_COUNT * 2 + 1,
+        'threads': 1,
+        'preload_app': True,
+        'max_requests': 500,
+        'max_requests_jitter': 50,
+        'timeout': 120,
+        'graceful_timeout': 30,
+        'keepalive': 2
+    },
+    'dev': {
+        'worker_class': 'gthread',
+        'workers': 1,
+        'threads': 4,
+        'preload_app': False,
+        'max_requests': 0,
+        'max_requests_jitter': 0,
+        'timeout': 300,
+        'graceful_timeout': 5,
+        'keepalive': 2,
+        'reload': True
+    }
+}
+
+profile_name = os.getenv('GUNICORN_PROFILE', 'gthread')
+if profile_name not in PROFILES:
+    raise RuntimeError(f"GUNICORN_PROFILE desconocido: {profile_name} (opciones: {', '.join(PROFILES)})")
+profile = PROFILES[profile_name]
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', profile['worker_class'])
+# WEB_CONCURRENCY es la variable estándar de Heroku para el número de workers
+workers = _env_int('WEB_CONCURRENCY', profile['workers'])
+threads = _env_int('GUNICORN_THREADS', profile['threads'])
+preload_app = _env_bool('GUNICORN_PRELOAD', profile['preload_app'])
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', profile['max_requests'])
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', profile['max_requests_jitter'])
+timeout = _env_int('GUNICORN_TIMEOUT', profile['timeout'])
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', profile['graceful_timeout'])
+keepalive = _env_int('GUNICORN_KEEPALIVE', profile['keepalive'])
+reload = profile.get('reload', False)
+accesslog = '-'
+
+# Con preload_app la app se importa una sola vez en el maestro: se cargan también
+# NumPy y matplotlib para que los workers los hereden con el fork
+if preload_app:
+    os.environ.setdefault('PRELOAD_MODULES', '1')
+
+# La app calcula con los hilos del worker el límite de llamadas simultáneas a OpenRouter
+# (LLM_MAX_CONCURRENCY, por defecto threads // 2)
+os.environ.setdefault('GUNICORN_THREADS', str(threads))
+
+# Cada worker tiene además su propio pool de procesos para Monte Carlo: en total son
+# workers x SIMULATION_WORKERS procesos. Por defecto SIMULATION_WORKERS es
+# max(1, núcleos // workers), así que con estos perfiles (workers >= núcleos) vale 1 y
+# las simulaciones grandes corren en el propio worker. Para repartir una simulación entre
+# varios núcleos, bajar WEB_CONCURRENCY y subir SIMULATION_WORKERS manteniendo el producto
+# cerca del número de núcleos.
+os.environ.setdefault('WEB_CONCURRENCY', str(workers))
+
+
+def when_ready(server):
+    server.log.info(
+        f"🚀 Perfil {profile_name}: {workers} workers {worker_class} x {threads} hilos, "
+        f"preload={preload_app}, max_requests={max_requests}, timeout={timeout}s"
+    )
+
+
+def worker_exit(server, worker):
+    # Vaciar las predicciones pendientes del buffer write-behind antes de salir
+    from app import prediction_writer
+    prediction_writer.stop()
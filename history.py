@@ -0,0 +1,114 @@
+"""
+Historial de predicciones de Goal2Goal
+Paginación por clave (keyset) sobre (created_at, id): cada página continúa justo después
+de la última fila de la anterior, así que cuesta lo mismo la página 1 que la 1000.
+Solo se seleccionan las columnas que muestran las vistas y se devuelven filas planas.
+"""
+
+import base64
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, and_, or_
+
+from models import Prediction
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Columnas que usan el dashboard y la API de historial
+HISTORY_COLUMNS = [
+    Prediction.id,
+    Prediction.team1_name,
+    Prediction.team2_name,
+    Prediction.poisson_btts,
+    Prediction.logistic_btts,
+    Prediction.final_btts,
+    Prediction.recommended_model,
+    Prediction.confidence_level,
+    Prediction.created_at
+]
+
+CURSOR_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+
+def encode_cursor(created_at, prediction_id):
+    """Cursor opaco con la posición de la última fila de una página"""
+    raw = f"{created_at.strftime(CURSOR_DATE_FORMAT)}|{prediction_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Devuelve (created_at, id). Lanza ValueError si el cursor no es válido"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, prediction_id = raw.split('|')
+        return datetime.strptime(created_at, CURSOR_DATE_FORMAT), int(prediction_id)
+    except (ValueError, UnicodeError):
+        raise ValueError("Cursor de paginación no válido")
+
+
+def parse_date(value, end=False):
+    """
+    Fecha (YYYY-MM-DD) o fecha y hora ISO. Con end=True una fecha sin hora
+    incluye el día completo. Lanza ValueError si el formato no es válido.
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Fecha no válida: {value}")
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def history_query(user_id, limit=DEFAULT_PAGE_SIZE, cursor=None, team=None,
+                  date_from=None, date_to=None, confidence=None):
+    """
+    SELECT de una página del historial (más recientes primero). Pide limit + 1 filas
+    para saber si hay página siguiente sin un COUNT.
+    """
+    query = select(*HISTORY_COLUMNS).where(Prediction.user_id == user_id)
+
+    if cursor:
+        created_at, prediction_id = decode_cursor(cursor)
+        query = query.where(or_(
+            Prediction.created_at < created_at,
+            and_(Prediction.created_at == created_at, Prediction.id < prediction_id)
+        ))
+    if team:
+        # Búsqueda por prefijo: puede usar el índice del nombre del equipo
+        query = query.where(or_(
+            Prediction.team1_name.startswith(team, autoescape=True),
+            Prediction.team2_name.startswith(team, autoescape=True)
+        ))
+    if date_from:
+        query = query.where(Prediction.created_at >= date_from)
+    if date_to:
+        query = query.where(Prediction.created_at < date_to)
+    if confidence:
+        query = query.where(Prediction.confidence_level.in_(confidence))
+
+    return query.order_by(Prediction.created_at.desc(), Prediction.id.desc()).limit(limit + 1)
+
+
+def serialize_row(row):
+    return {
+        "id": row.id,
+        "team1": row.team1_name,
+        "team2": row.team2_name,
+        "poisson_btts": float(row.poisson_btts) if row.poisson_btts else 0,
+        "logistic_btts": float(row.logistic_btts) if row.logistic_btts else 0,
+        "final_btts": float(row.final_btts) if row.final_btts else 0,
+        "recommended_model": row.recommended_model,
+        "confidence_level": row.confidence_level,
+        "created_at": row.created_at.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+
+def paginate(rows, limit):
+    """Separa la fila extra de history_query(): devuelve (filas, cursor siguiente o None)"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
@@ -18,7 +18,7 @@ def create_database():
 
     try:
         # Conectar a MySQL sin especificar base de datos
-        print("\n[1/4] Conectando a MySQL...")
+        print("\n[1/7] Conectando a MySQL...")
         connection = pymysql.connect(
             host=host,
             port=port,
@@ -30,12 +30,12 @@ def create_database():
         cursor = connection.cursor()
 
         # Crear base de datos
-        print("[2/4] Creando base de datos 'goal2goal_db'...")
+        print("[2/7] Creando base de datos 'goal2goal_db'...")
         cursor.execute("CREATE DATABASE IF NOT EXISTS goal2goal_db CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
         cursor.execute("USE goal2goal_db")
 
         # Crear tabla users
-        print("[3/4] Creando tabla 'users'...")
+        print("[3/7] Creando tabla 'users'...")
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS users (
                 id INT PRIMARY KEY AUTO_INCREMENT,
@@ -51,7 +51,7 @@ def create_database():
         """)
 
         # Crear tabla predictions
-        print("[4/4] Creando tabla 'predictions'...")
+        print("[4/7] Creando tabla 'predictions'...")
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS predictions (
                 id INT PRIMARY KEY AUTO_INCREMENT,
@@ -75,16 +75,82 @@ def create_database():
                 confidence_level VARCHAR(20),
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                INDEX idx_user_id (user_id),
+                INDEX idx_user_created_id (user_id, created_at, id),
+                INDEX idx_user_team1 (user_id, team1_name),
+                INDEX idx_user_team2 (user_id, team2_name),
                 INDEX idx_created_at (created_at)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
         """)
 
+        # Crear tabla user_prediction_stats
+        print("[5/7] Creando tabla 'user_prediction_stats'...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS user_prediction_stats (
+                user_id INT PRIMARY KEY,
+                prediction_count INT NOT NULL DEFAULT 0,
+                poisson_btts_sum DECIMAL(14,2) NOT NULL DEFAULT 0,
+                logistic_btts_sum DECIMAL(14,2) NOT NULL DEFAULT 0,
+                final_btts_sum DECIMAL(14,2) NOT NULL DEFAULT 0,
+                model_consensus INT NOT NULL DEFAULT 0,
+                model_poisson INT NOT NULL DEFAULT 0,
+                model_logistic INT NOT NULL DEFAULT 0,
+                model_other INT NOT NULL DEFAULT 0,
+                confidence_high INT NOT NULL DEFAULT 0,
+                confidence_medium INT NOT NULL DEFAULT 0,
+                confidence_low INT NOT NULL DEFAULT 0,
+                confidence_other INT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
+
+        # Crear tabla team_stats_cache
+        print("[6/7] Creando tabla 'team_stats_cache'...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS team_stats_cache (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                team_name VARCHAR(100) NOT NULL UNIQUE,
+                team_name_normalized VARCHAR(100),
+                goals_scored DECIMAL(5,2),
+                goals_conceded DECIMAL(5,2),
+                possession DECIMAL(5,2),
+                shots_on_target DECIMAL(5,2),
+                passing_accuracy DECIMAL(5,2),
+                fouls DECIMAL(5,2),
+                corners DECIMAL(5,2),
+                yellow_cards DECIMAL(5,2),
+                red_cards DECIMAL(5,2),
+                source VARCHAR(50),
+                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                INDEX idx_team_name_normalized (team_name_normalized),
+                INDEX idx_last_updated (last_updated)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
+
+        # Crear tabla background_jobs
+        print("[7/7] Creando tabla 'background_jobs'...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS background_jobs (
+                id VARCHAR(32) PRIMARY KEY,
+                kind VARCHAR(30) NOT NULL,
+                user_id INT NOT NULL,
+                status VARCHAR(10) NOT NULL,
+                result MEDIUMTEXT,
+                error TEXT,
+                created_at DOUBLE NOT NULL,
+                started_at DOUBLE,
+                finished_at DOUBLE,
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+                INDEX idx_user_status (user_id, status)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """)
+
         connection.commit()
 
         print("\n✅ Base de datos inicializada correctamente!")
         print(f"\n📊 Base de datos: goal2goal_db")
-        print(f"📝 Tablas creadas: users, predictions")
+        print(f"📝 Tablas creadas: users, predictions, user_prediction_stats, team_stats_cache, background_jobs")
         print(f"\n🔧 Actualiza tu archivo .env con:")
         print(f"   MYSQL_HOST={host}")
         print(f"   MYSQL_PORT={port}")
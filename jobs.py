@@ -0,0 +1,262 @@
+"""
+Cola de trabajos en segundo plano de Goal2Goal
+Las tareas lentas (Monte Carlo con millones de simulaciones, explicaciones de IA) se
+ejecutan en un pool de hilos propio: la petición HTTP devuelve un ID de trabajo al
+instante y el cliente consulta el resultado, sin ocupar los workers web mientras tanto.
+
+Con un DatabaseJobStore el estado de cada trabajo se guarda en la tabla background_jobs:
+la consulta /jobs/<id> puede llegar a cualquier worker de gunicorn y el límite de trabajos
+por usuario es global. El trabajo se ejecuta en el worker que lo recibió.
+"""
+
+import json
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select, insert, update, delete, func
+
+from models import db, User, BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+class JobLimitError(Exception):
+    """El usuario ya tiene el máximo de trabajos en curso"""
+
+
+class Job:
+    """Un trabajo enviado a la cola, con su estado y resultado"""
+
+    def __init__(self, kind, user_id):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.user_id = user_id
+        self.status = STATUS_QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._finished = threading.Event()
+        # Trabajo de otro worker: wait() consulta el almacén compartido
+        self._store = None
+
+    @classmethod
+    def from_record(cls, record, store):
+        job = cls(record['kind'], record['user_id'])
+        job.id = record['id']
+        job._store = store
+        job._load(record)
+        return job
+
+    def _load(self, record):
+        self.status = record['status']
+        self.result = json.loads(record['result']) if record['result'] else None
+        self.error = record['error']
+        self.created_at = record['created_at']
+        self.started_at = record['started_at']
+        self.finished_at = record['finished_at']
+
+    @property
+    def active(self):
+        return self.status in (STATUS_QUEUED, STATUS_RUNNING)
+
+    def wait(self, timeout):
+        """Espera a que termine el trabajo como mucho 'timeout' segundos"""
+        if self._store is None:
+            return self._finished.wait(timeout)
+        deadline = time.monotonic() + timeout
+        while self.active and time.monotonic() < deadline:
+            time.sleep(min(self._store.poll_interval, max(deadline - time.monotonic(), 0)))
+            record = self._store.load(self.id)
+            if record is None:
+                break
+            self._load(record)
+        return not self.active
+
+    def to_dict(self):
+        data = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+        if self.status == STATUS_DONE:
+            data['result'] = self.result
+        elif self.status == STATUS_FAILED:
+            data['error'] = self.error
+        return data
+
+
+class DatabaseJobStore:
+    """
+    Estado de los trabajos en background_jobs, visible desde todos los workers.
+    Un trabajo que sigue activo tras max_runtime segundos se da por perdido (el worker
+    que lo ejecutaba se reinició) y deja de contar para el límite del usuario.
+    """
+
+    def __init__(self, max_runtime=900, poll_interval=0.25):
+        self.max_runtime = max_runtime
+        self.poll_interval = poll_interval
+        self.table = BackgroundJob.__table__
+        self._app = None
+        self._last_purge = 0
+
+    def init_app(self, app):
+        self._app = app
+
+    def _columns(self, job):
+        return {
+            'status': job.status,
+            'result': json.dumps(job.result, default=str) if job.result is not None else None,
+            'error': job.error,
+            'started_at': job.started_at,
+            'finished_at': job.finished_at
+        }
+
+    def reserve(self, job, max_per_user):
+        """Registra el trabajo si el usuario no ha llegado al límite; si no, lanza JobLimitError"""
+        with self._app.app_context():
+            with db.engine.begin() as connection:
+                # Bloquea la fila del usuario: serializa sus envíos entre workers
+                connection.execute(select(User.id).where(User.id == job.user_id).with_for_update())
+                active = connection.execute(
+                    select(func.count()).select_from(self.table).where(
+                        self.table.c.user_id == job.user_id,
+                        self.table.c.status.in_([STATUS_QUEUED, STATUS_RUNNING]),
+                        self.table.c.created_at > time.time() - self.max_runtime
+                    )
+                ).scalar()
+                if active >= max_per_user:
+                    raise JobLimitError(f"Máximo {max_per_user} trabajos en curso por usuario")
+                connection.execute(insert(self.table).values(
+                    id=job.id, kind=job.kind, user_id=job.user_id, created_at=job.created_at,
+                    **self._columns(job)
+                ))
+
+    def save(self, job):
+        with self._app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(update(self.table).where(self.table.c.id == job.id).values(**self._columns(job)))
+
+    def load(self, job_id):
+        with self._app.app_context():
+            with db.engine.connect() as connection:
+                record = connection.execute(select(self.table).where(self.table.c.id == job_id)).mappings().first()
+        if record is None:
+            return None
+        record = dict(record)
+        if record['status'] in (STATUS_QUEUED, STATUS_RUNNING) and record['created_at'] < time.time() - self.max_runtime:
+            record.update(status=STATUS_FAILED, error="El trabajo se interrumpió (reinicio del worker)")
+        return record
+
+    def purge(self, ttl):
+        """Borra los trabajos terminados hace más de ttl segundos (como mucho una vez por minuto)"""
+        now = time.time()
+        if now - self._last_purge < 60:
+            return
+        self._last_purge = now
+        with self._app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(delete(self.table).where(self.table.c.created_at < now - max(ttl, self.max_runtime)))
+
+
+class JobManager:
+    """
+    Ejecuta trabajos en un ThreadPoolExecutor con un límite de trabajos activos por usuario.
+    Los trabajos terminados se conservan 'ttl' segundos para poder consultarlos. Con store
+    (DatabaseJobStore) el estado y el límite se comparten entre workers.
+    """
+
+    def __init__(self, max_workers=4, max_per_user=2, ttl=3600, store=None):
+        self.max_workers = max_workers
+        self.max_per_user = max_per_user
+        self.ttl = ttl
+        self.store = store
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='goal2goal-job')
+
+    def _purge(self):
+        """Elimina los trabajos terminados hace más de ttl segundos (con el lock tomado)"""
+        cutoff = time.time() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if not job.active and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, kind, user_id, fn, *args, **kwargs):
+        """
+        Encola fn(*args, **kwargs) y devuelve el Job. El resultado debe ser serializable en JSON.
+        Lanza JobLimitError si el usuario ya tiene max_per_user trabajos activos.
+        """
+        job = Job(kind, user_id)
+        if self.store is not None:
+            self.store.purge(self.ttl)
+            self.store.reserve(job, self.max_per_user)
+        with self._lock:
+            self._purge()
+            if self.store is None:
+                active = sum(1 for other in self._jobs.values() if other.user_id == user_id and other.active)
+                if active >= self.max_per_user:
+                    raise JobLimitError(f"Máximo {self.max_per_user} trabajos en curso por usuario")
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        logger.info(f"📥 Trabajo {kind} encolado: {job.id}")
+        return job
+
+    def _save(self, job):
+        if self.store is None:
+            return
+        try:
+            self.store.save(job)
+        except Exception as e:
+            logger.error(f"❌ No se pudo guardar el estado del trabajo {job.id}: {e}")
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = STATUS_RUNNING
+        job.started_at = time.time()
+        self._save(job)
+        try:
+            job.result = fn(*args, **kwargs)
+            job.status = STATUS_DONE
+        except Exception as e:
+            logger.error(f"❌ Trabajo {job.kind} {job.id} falló: {e}")
+            job.error = str(e)
+            job.status = STATUS_FAILED
+        finally:
+            job.finished_at = time.time()
+            self._save(job)
+            job._finished.set()
+
+    def get(self, job_id, user_id=None):
+        """Devuelve el trabajo o None si no existe (o no pertenece al usuario indicado)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            # Trabajo recibido por otro worker
+            record = self.store.load(job_id)
+            job = Job.from_record(record, self.store) if record else None
+        if job is None or (user_id is not None and job.user_id != user_id):
+            return None
+        return job
+
+    def stats(self):
+        """Contadores de la cola para monitorización"""
+        with self._lock:
+            counts = {STATUS_QUEUED: 0, STATUS_RUNNING: 0, STATUS_DONE: 0, STATUS_FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return dict(counts, max_workers=self.max_workers, max_per_user=self.max_per_user,
+                    shared=self.store is not None)
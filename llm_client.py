@@ -0,0 +1,440 @@
+"""
+Cliente HTTP asíncrono para OpenRouter
+Un event loop de asyncio en un hilo propio con un httpx.AsyncClient compartido
+(conexiones keep-alive reutilizadas), fallback entre modelos con modo "hedged"
+opcional, un límite de llamadas simultáneas para no bloquear los workers web y
+un circuit breaker por modelo que reordena u omite modelos según su salud reciente.
+"""
+
+import os
+import json
+import time
+import queue
+import asyncio
+import logging
+import threading
+import statistics
+import concurrent.futures
+from collections import deque
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+class LLMError(Exception):
+    """Error al obtener respuesta de un modelo"""
+
+
+class LLMUnavailableError(LLMError):
+    """Ningún modelo de la lista devolvió una respuesta válida"""
+
+
+class LLMBusyError(LLMError):
+    """Se alcanzó el máximo de llamadas simultáneas a OpenRouter"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de un modelo con estadísticas móviles de errores y latencia.
+    closed: se usa normalmente. open: se omite durante 'cooldown' segundos tras
+    'failure_threshold' fallos seguidos. half_open: se permite una sola llamada de
+    prueba; si funciona el circuito se cierra y si falla vuelve a abrirse.
+    Las estadísticas solo cuentan los últimos 'window' segundos.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, cooldown=30, window=300):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+        self.window = window
+        self.outcomes = deque(maxlen=200)  # (instante, éxito, latencia en segundos)
+        self.total_successes = 0
+        self.total_failures = 0
+
+    def allow_request(self):
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.state = self.HALF_OPEN
+        if self.probe_in_flight:
+            return False
+        self.probe_in_flight = True
+        return True
+
+    def _recent(self):
+        cutoff = time.monotonic() - self.window
+        while self.outcomes and self.outcomes[0][0] < cutoff:
+            self.outcomes.popleft()
+        return self.outcomes
+
+    def record_success(self, latency):
+        self.outcomes.append((time.monotonic(), True, latency))
+        self.total_successes += 1
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+        self.state = self.CLOSED
+
+    def record_failure(self, latency):
+        self.outcomes.append((time.monotonic(), False, latency))
+        self.total_failures += 1
+        self.consecutive_failures += 1
+        self.probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def record_cancelled(self):
+        """Llamada cancelada (p. ej. perdió la carrera en modo hedged): no cuenta como fallo"""
+        self.probe_in_flight = False
+
+    def error_rate(self):
+        recent = self._recent()
+        if not recent:
+            return 0.0
+        return sum(1 for _, ok, _ in recent if not ok) / len(recent)
+
+    def median_latency(self):
+        latencies = [latency for _, ok, latency in self._recent() if ok]
+        return statistics.median(latencies) if latencies else None
+
+    def snapshot(self):
+        median_latency = self.median_latency()
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'error_rate': round(self.error_rate(), 3),
+            'median_latency': round(median_latency, 3) if median_latency is not None else None,
+            'recent_calls': len(self._recent()),
+            'total_successes': self.total_successes,
+            'total_failures': self.total_failures,
+            'retry_in': round(max(0.0, self.cooldown - (time.monotonic() - self.opened_at)), 1)
+            if self.state == self.OPEN else 0
+        }
+
+
+class ModelHealthTracker:
+    """Circuit breakers de todos los modelos y orden de preferencia según su salud reciente"""
+
+    STATE_RANK = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+
+    def __init__(self, failure_threshold=3, cooldown=30, window=300, slow_threshold=30):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.window = window
+        self.slow_threshold = slow_threshold
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def _breaker(self, model):
+        if model not in self._breakers:
+            self._breakers[model] = CircuitBreaker(self.failure_threshold, self.cooldown, self.window)
+        return self._breakers[model]
+
+    def ranked(self, models):
+        """
+        Ordena los modelos: primero los circuitos cerrados, después por tasa de error
+        (en tramos del 25%) y penalizando los lentos; empata por el orden configurado
+        """
+        def score(model):
+            breaker = self._breaker(model)
+            median_latency = breaker.median_latency()
+            slow = median_latency is not None and median_latency > self.slow_threshold
+            return (self.STATE_RANK[breaker.state], int(breaker.error_rate() * 4) + slow)
+
+        with self._lock:
+            return sorted(models, key=score)
+
+    def allow_request(self, model):
+        with self._lock:
+            return self._breaker(model).allow_request()
+
+    def record_success(self, model, latency):
+        with self._lock:
+            self._breaker(model).record_success(latency)
+
+    def record_failure(self, model, latency):
+        with self._lock:
+            self._breaker(model).record_failure(latency)
+
+    def record_cancelled(self, model):
+        with self._lock:
+            self._breaker(model).record_cancelled()
+
+    def snapshot(self):
+        with self._lock:
+            return {model: breaker.snapshot() for model, breaker in self._breakers.items()}
+
+
+class OpenRouterClient:
+    """
+    Cliente compartido por todos los hilos del proceso. Las peticiones se ejecutan en
+    el event loop de fondo; los hilos web solo esperan el resultado.
+    """
+
+    def __init__(self, api_url, api_key, timeout=90, hedge_delay=None,
+                 max_concurrency=16, max_connections=20, health=None):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.health = health or ModelHealthTracker()
+        self.in_flight = 0
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._client = None
+        self._pid = None
+
+    # ------------------------------------------------------------------
+    # Event loop de fondo
+    # ------------------------------------------------------------------
+
+    def _ensure_loop(self):
+        """Arranca el hilo del event loop en el primer uso (y de nuevo tras un fork)"""
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._client = None
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name='openrouter-loop', daemon=True).start()
+            return self._loop
+
+    async def _get_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=10),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {self.api_key}"
+                }
+            )
+        return self._client
+
+    def _acquire_slot(self):
+        if not self._slots.acquire(blocking=False):
+            raise LLMBusyError("Demasiadas solicitudes de IA en curso")
+        with self._lock:
+            self.in_flight += 1
+
+    def _release_slot(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    @property
+    def configured(self):
+        return bool(self.api_key)
+
+    def require_api_key(self):
+        """
+        Comprueba la API key en el primer uso (no al arrancar): los workers que nunca
+        llaman a la IA pueden arrancar sin ella
+        """
+        if not self.api_key:
+            raise RuntimeError(
+                "📣 La variable OPENROUTER_API_KEY no está definida.\n"
+                "   ➜ Crea un archivo .env en la raíz con:\n"
+                "     OPENROUTER_API_KEY=tu_api_key_aqui"
+            )
+
+    def status(self):
+        """Estado para monitorización: salud de cada modelo y llamadas en curso"""
+        return {
+            'configured': self.configured,
+            'models': self.health.snapshot(),
+            'in_flight': self.in_flight,
+            'max_concurrency': self.max_concurrency,
+            'hedge_delay': self.hedge_delay
+        }
+
+    # ------------------------------------------------------------------
+    # Peticiones
+    # ------------------------------------------------------------------
+
+    async def _request(self, model, payload):
+        """Una llamada a un modelo; devuelve el contenido o lanza LLMError"""
+        client = await self._get_client()
+        logger.info(f"Probando modelo: {model}")
+        response = await client.post(self.api_url, json=payload)
+
+        if response.status_code == 200:
+            result = response.json()
+            if result.get('choices'):
+                content = result['choices'][0]['message']['content']
+                if content and content.strip():
+                    return content
+            raise LLMError(f"Respuesta vacía del modelo {model}")
+        elif response.status_code == 429:
+            raise LLMError(f"Modelo {model} con rate limit (429)")
+        elif response.status_code == 404:
+            raise LLMError(f"Modelo {model} no existe (404)")
+        elif response.status_code in (502, 503):
+            raise LLMError(f"Error del servidor con {model} ({response.status_code})")
+        raise LLMError(f"Error con el modelo {model}: {response.status_code} - {response.text}")
+
+    async def _tracked_request(self, model, payload):
+        """
+        _request registrando el resultado y la latencia en el circuit breaker del modelo.
+        La cancelación la registra _launch_tracked: la tarea puede cancelarse antes de empezar.
+        """
+        started = time.monotonic()
+        try:
+            content = await self._request(model, payload)
+        except Exception:
+            self.health.record_failure(model, time.monotonic() - started)
+            raise
+        self.health.record_success(model, time.monotonic() - started)
+        return content
+
+    def _launch_tracked(self, model, payload):
+        """
+        Tarea con _tracked_request para un modelo cuya llamada ya autorizó allow_request().
+        Si se cancela (aunque sea antes de llegar a ejecutarse) libera la llamada de prueba
+        del circuito, para que un half_open no se quede bloqueado.
+        """
+        task = asyncio.ensure_future(self._tracked_request(model, payload))
+
+        def release_if_cancelled(done_task):
+            if done_task.cancelled():
+                self.health.record_cancelled(model)
+
+        task.add_done_callback(release_if_cancelled)
+        return task
+
+    async def _complete(self, models, build_payload):
+        """
+        Prueba los modelos en orden. Si un modelo falla se lanza el siguiente de inmediato;
+        con hedge_delay, además se lanza el siguiente cuando el actual tarda más de ese
+        tiempo, y se queda la primera respuesta válida.
+        """
+        remaining = self.health.ranked(models)
+        pending = {}
+
+        def launch():
+            # Siguiente modelo cuyo circuito permita llamadas
+            while remaining:
+                model = remaining.pop(0)
+                if self.health.allow_request(model):
+                    pending[self._launch_tracked(model, build_payload(model))] = model
+                    return
+                logger.info(f"⛔ Circuito abierto para {model}, se omite")
+
+        launch()
+        try:
+            while pending:
+                wait_for = self.hedge_delay if (self.hedge_delay and remaining) else None
+                done, _ = await asyncio.wait(pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    logger.info(f"⏱️ Sin respuesta en {self.hedge_delay}s, lanzando modelo de respaldo")
+                    launch()
+                    continue
+
+                for task in done:
+                    model = pending.pop(task)
+                    try:
+                        return model, task.result()
+                    except Exception as e:
+                        logger.warning(f"⚠️ {e}" if isinstance(e, LLMError) else f"❌ Excepción con modelo {model}: {e}")
+                        if remaining:
+                            launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise LLMUnavailableError("Todos los modelos fallaron")
+
+    def complete(self, models, build_payload):
+        """
+        Versión síncrona para las rutas de Flask: devuelve (modelo, contenido).
+        build_payload(model) construye el cuerpo de la petición para cada modelo.
+        """
+        self.require_api_key()
+        self._acquire_slot()
+        try:
+            future = asyncio.run_coroutine_threadsafe(self._complete(models, build_payload), self._ensure_loop())
+            try:
+                return future.result(timeout=self.timeout * len(models) + 5)
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                raise LLMUnavailableError("Tiempo de espera agotado con todos los modelos")
+        finally:
+            self._release_slot()
+
+    def stream(self, model, payload):
+        """
+        Iterador síncrono con los fragmentos de contenido de una respuesta en streaming.
+        La lectura ocurre en el event loop y los fragmentos llegan por una cola.
+        """
+        self.require_api_key()
+        if not self.health.allow_request(model):
+            raise LLMError(f"Circuito abierto para {model}, se omite")
+        try:
+            self._acquire_slot()
+        except LLMBusyError:
+            self.health.record_cancelled(model)
+            raise
+        chunks = queue.Queue()
+
+        async def produce():
+            started = time.monotonic()
+            try:
+                client = await self._get_client()
+                async with client.stream('POST', self.api_url, json=payload) as response:
+                    if response.status_code != 200:
+                        raise LLMError(f"Modelo {model} respondió {response.status_code}")
+                    async for line in response.aiter_lines():
+                        # OpenRouter intercala comentarios (": OPENROUTER PROCESSING") entre los datos
+                        if not line.startswith('data: '):
+                            continue
+                        data = line[len('data: '):]
+                        if data == '[DONE]':
+                            break
+                        choices = json.loads(data).get('choices') or [{}]
+                        content = choices[0].get('delta', {}).get('content')
+                        if content:
+                            chunks.put(content)
+                self.health.record_success(model, time.monotonic() - started)
+            except asyncio.CancelledError:
+                self.health.record_cancelled(model)
+                raise
+            except Exception as e:
+                self.health.record_failure(model, time.monotonic() - started)
+                chunks.put(e)
+            finally:
+                chunks.put(_END)
+
+        future = asyncio.run_coroutine_threadsafe(produce(), self._ensure_loop())
+        try:
+            while True:
+                try:
+                    item = chunks.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise LLMError(f"Tiempo de espera agotado con el modelo {model}")
+                if item is _END:
+                    return
+                if isinstance(item, LLMError):
+                    raise item
+                if isinstance(item, Exception):
+                    raise LLMError(f"Excepción con modelo {model}: {item}") from item
+                yield item
+        finally:
+            # Si el navegador se desconecta, se cancela la lectura en el event loop
+            future.cancel()
+            self._release_slot()
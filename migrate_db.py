@@ -0,0 +1,142 @@
+"""
+Migraciones de esquema de Goal2Goal (MySQL)
+Cada migración comprueba el esquema antes de tocarlo, así que se puede aplicar sobre
+bases creadas con database_setup.sql, init_db.py o db.create_all(). Las aplicadas se
+registran en la tabla schema_migrations.
+
+    python migrate_db.py            # aplica las pendientes
+    python migrate_db.py --status   # lista aplicadas y pendientes
+"""
+
+import sys
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+from database import primary_uri
+from models import UserPredictionStats, TeamStatsCache, BackgroundJob
+import user_stats
+
+# Índices con DDL en línea de InnoDB: la tabla sigue aceptando lecturas y escrituras
+ONLINE_DDL = "ALGORITHM=INPLACE, LOCK=NONE"
+
+
+def table_exists(connection, table):
+    return connection.execute(text(
+        "SELECT COUNT(*) FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND table_name = :table"
+    ), {'table': table}).scalar() > 0
+
+
+def index_names(connection, table):
+    rows = connection.execute(text(
+        "SELECT DISTINCT index_name FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = :table"
+    ), {'table': table})
+    return {row[0] for row in rows}
+
+
+def add_index(connection, table, name, columns):
+    if name in index_names(connection, table):
+        print(f"   = {table}.{name} ya existe")
+        return
+    print(f"   + {table}.{name} ({columns})")
+    connection.execute(text(f"ALTER TABLE {table} ADD INDEX {name} ({columns}), {ONLINE_DDL}"))
+
+
+def drop_index(connection, table, name):
+    if name not in index_names(connection, table):
+        return
+    print(f"   - {table}.{name}")
+    connection.execute(text(f"ALTER TABLE {table} DROP INDEX {name}, {ONLINE_DDL}"))
+
+
+def prediction_history_indexes(connection):
+    """Índice compuesto del historial y de búsqueda por equipo en predictions"""
+    if not table_exists(connection, 'predictions'):
+        print("   = predictions no existe todavía (se creará ya con los índices)")
+        return
+    add_index(connection, 'predictions', 'idx_user_created_id', 'user_id, created_at, id')
+    add_index(connection, 'predictions', 'idx_user_team1', 'user_id, team1_name')
+    add_index(connection, 'predictions', 'idx_user_team2', 'user_id, team2_name')
+    # El compuesto empieza por user_id: el índice simple sobra (también para la FK).
+    # idx_user_id viene de database_setup.sql/init_db.py, ix_predictions_user_id de create_all()
+    for name in ('idx_user_id', 'ix_predictions_user_id'):
+        drop_index(connection, 'predictions', name)
+
+
+def user_prediction_stats(connection):
+    """Tabla de agregados por usuario, calculada a partir del historial existente"""
+    UserPredictionStats.__table__.create(connection, checkfirst=True)
+    if table_exists(connection, 'predictions'):
+        print("   + user_prediction_stats (recalculada desde predictions)")
+        user_stats.rebuild(connection)
+
+
+def team_stats_cache(connection):
+    """Tabla de estadísticas de equipos (solo existía si se creó con db.create_all())"""
+    if not table_exists(connection, 'team_stats_cache'):
+        print("   + team_stats_cache")
+        TeamStatsCache.__table__.create(connection)
+
+
+def background_jobs(connection):
+    """Estado de los trabajos en segundo plano compartido entre workers"""
+    if not table_exists(connection, 'background_jobs'):
+        print("   + background_jobs")
+        BackgroundJob.__table__.create(connection)
+
+
+# (nombre, función) en orden de aplicación
+MIGRATIONS = [
+    ('001_prediction_history_indexes', prediction_history_indexes),
+    ('002_user_prediction_stats', user_prediction_stats),
+    ('003_team_stats_cache', team_stats_cache),
+    ('004_background_jobs', background_jobs),
+]
+
+
+def applied_migrations(connection):
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "name VARCHAR(100) PRIMARY KEY, "
+        "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+        ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci"
+    ))
+    return {row[0] for row in connection.execute(text("SELECT name FROM schema_migrations"))}
+
+
+def main():
+    load_dotenv()
+    engine = create_engine(primary_uri())
+
+    with engine.begin() as connection:
+        applied = applied_migrations(connection)
+    pending = [(name, migrate) for name, migrate in MIGRATIONS if name not in applied]
+
+    if '--status' in sys.argv:
+        for name, _ in MIGRATIONS:
+            print(f"{'✅' if name in applied else '⏳'} {name}")
+        return 0
+
+    if not pending:
+        print("✅ Esquema al día")
+        return 0
+
+    for name, migrate in pending:
+        print(f"🔧 {name}")
+        try:
+            # MySQL confirma cada ALTER TABLE por separado: las migraciones deben poder repetirse
+            with engine.begin() as connection:
+                migrate(connection)
+                connection.execute(text("INSERT INTO schema_migrations (name) VALUES (:name)"), {'name': name})
+        except Exception as e:
+            print(f"❌ Error en {name}: {e}")
+            return 1
+
+    print(f"✅ {len(pending)} migraciones aplicadas")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -28,16 +28,24 @@ class User(UserMixin, db.Model):
         return f'<User {self.username}>'
 
     def get_prediction_count(self):
-        """Obtener número total de predicciones del usuario"""
-        return len(self.predictions)
+        """Obtener número total de predicciones del usuario (de user_prediction_stats, sin cargarlas)"""
+        stats = db.session.get(UserPredictionStats, self.id)
+        return stats.prediction_count if stats else 0
 
 
 class Prediction(db.Model):
     """Modelo de Predicción BTTS"""
     __tablename__ = 'predictions'
+    __table_args__ = (
+        # Historial: WHERE user_id = ? ORDER BY created_at DESC, id DESC (también cubre la FK)
+        db.Index('idx_user_created_id', 'user_id', 'created_at', 'id'),
+        # Búsqueda por prefijo del nombre de equipo dentro del historial de un usuario
+        db.Index('idx_user_team1', 'user_id', 'team1_name'),
+        db.Index('idx_user_team2', 'user_id', 'team2_name'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
 
     # Nombres de equipos
     team1_name = db.Column(db.String(100), nullable=False)
@@ -84,6 +92,60 @@ class Prediction(db.Model):
         }
 
 
+class UserPredictionStats(db.Model):
+    """Agregados de las predicciones de cada usuario, mantenidos en cada INSERT/DELETE (ver user_stats.py)"""
+    __tablename__ = 'user_prediction_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    prediction_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Sumas de probabilidades BTTS (media = suma / prediction_count)
+    poisson_btts_sum = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    logistic_btts_sum = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    final_btts_sum = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    # Reparto por modelo recomendado
+    model_consensus = db.Column(db.Integer, nullable=False, default=0)
+    model_poisson = db.Column(db.Integer, nullable=False, default=0)
+    model_logistic = db.Column(db.Integer, nullable=False, default=0)
+    model_other = db.Column(db.Integer, nullable=False, default=0)
+
+    # Reparto por nivel de confianza
+    confidence_high = db.Column(db.Integer, nullable=False, default=0)
+    confidence_medium = db.Column(db.Integer, nullable=False, default=0)
+    confidence_low = db.Column(db.Integer, nullable=False, default=0)
+    confidence_other = db.Column(db.Integer, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<UserPredictionStats {self.user_id}: {self.prediction_count}>'
+
+
+class BackgroundJob(db.Model):
+    """Estado de un trabajo en segundo plano, compartido por todos los workers (ver jobs.py)"""
+    __tablename__ = 'background_jobs'
+    __table_args__ = (
+        # Trabajos activos de un usuario (límite por usuario)
+        db.Index('idx_user_status', 'user_id', 'status'),
+    )
+
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(30), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    status = db.Column(db.String(10), nullable=False)
+    result = db.Column(db.Text(16777215))  # JSON (MEDIUMTEXT en MySQL)
+    error = db.Column(db.Text)
+
+    # Marcas de tiempo Unix, como Job.to_dict()
+    created_at = db.Column(db.Double, nullable=False)
+    started_at = db.Column(db.Double)
+    finished_at = db.Column(db.Double)
+
+    def __repr__(self):
+        return f'<BackgroundJob {self.kind} {self.id}: {self.status}>'
+
+
 class TeamStatsCache(db.Model):
     """Caché de estadísticas de equipos con actualización automática"""
     __tablename__ = 'team_stats_cache'
@@ -0,0 +1,104 @@
+"""
+Tablas precalculadas de Poisson para Goal2Goal
+PMF y CDF sobre una rejilla de lambdas (0.50 - 4.00, paso 0.01) y goles 0 - 15,
+construidas una sola vez al importar el módulo y consultadas con interpolación lineal
+"""
+
+import numpy as np
+
+LAMBDA_GRID_MIN = 0.5
+LAMBDA_GRID_MAX = 4.0
+LAMBDA_GRID_STEP = 0.01
+MAX_GOALS = 15
+
+_GOALS = np.arange(MAX_GOALS + 1)
+
+
+def poisson_pmf(lam, max_goals=MAX_GOALS):
+    """
+    Cálculo directo de P(X = k) = e^-λ λ^k / k! para k = 0..max_goals.
+    Acepta un escalar (devuelve un vector) o un array de lambdas (devuelve una fila por lambda).
+    """
+    lam = np.asarray(lam, dtype=float)
+    k = np.arange(max_goals + 1)
+    factorials = np.cumprod(np.concatenate(([1.0], k[1:].astype(float))))
+    return np.exp(-lam)[..., None] * np.power(lam[..., None], k) / factorials
+
+
+def _build_tables():
+    """Construye la rejilla de lambdas y las tablas PMF/CDF (solo se ejecuta al importar)"""
+    n_points = int(round((LAMBDA_GRID_MAX - LAMBDA_GRID_MIN) / LAMBDA_GRID_STEP)) + 1
+    grid = LAMBDA_GRID_MIN + LAMBDA_GRID_STEP * np.arange(n_points)
+    pmf_table = poisson_pmf(grid)
+    cdf_table = np.cumsum(pmf_table, axis=1)
+    pmf_table.setflags(write=False)
+    cdf_table.setflags(write=False)
+    return grid, pmf_table, cdf_table
+
+
+LAMBDA_GRID, PMF_TABLE, CDF_TABLE = _build_tables()
+
+
+def _lookup(table, lam, cumulative=False):
+    """
+    Consulta una tabla interpolando linealmente entre los dos puntos de la rejilla más cercanos.
+    Las lambdas fuera de la rejilla se calculan directamente.
+    """
+    lam = np.asarray(lam, dtype=float)
+    position = (lam - LAMBDA_GRID_MIN) / LAMBDA_GRID_STEP
+    in_grid = (lam >= LAMBDA_GRID_MIN) & (lam <= LAMBDA_GRID_MAX)
+
+    lower = np.clip(np.floor(position).astype(int), 0, len(LAMBDA_GRID) - 2)
+    frac = np.clip(position - lower, 0.0, 1.0)[..., None]
+    values = table[lower] * (1 - frac) + table[lower + 1] * frac
+
+    if not np.all(in_grid):
+        direct = poisson_pmf(lam)
+        if cumulative:
+            direct = np.cumsum(direct, axis=-1)
+        values = np.where(in_grid[..., None], values, direct)
+    return values
+
+
+def pmf(lam):
+    """Vector P(X = k), k = 0..15 (o una fila por lambda si se pasa un array)"""
+    return _lookup(PMF_TABLE, lam)
+
+
+def cdf(lam):
+    """Vector P(X <= k), k = 0..15 (o una fila por lambda si se pasa un array)"""
+    return _lookup(CDF_TABLE, lam, cumulative=True)
+
+
+def prob_scores(lam):
+    """Probabilidad de marcar al menos un gol: 1 - P(X = 0)"""
+    return 1.0 - pmf(lam)[..., 0]
+
+
+def score_matrix(lambda_team1, lambda_team2):
+    """
+    Matriz de probabilidades de cada marcador i-j (i goles del equipo 1, j del equipo 2).
+    Con arrays de lambdas devuelve una matriz por partido, con forma (n, 16, 16).
+    """
+    return pmf(lambda_team1)[..., :, None] * pmf(lambda_team2)[..., None, :]
+
+
+def btts_probability(lambda_team1, lambda_team2):
+    """Probabilidad de que ambos equipos marquen (Poisson independientes)"""
+    return prob_scores(lambda_team1) * prob_scores(lambda_team2)
+
+
+def outcome_probabilities(lambda_team1, lambda_team2):
+    """Probabilidades de victoria local, empate y victoria visitante"""
+    matrix = score_matrix(lambda_team1, lambda_team2)
+    team1_win = np.tril(matrix, k=-1).sum(axis=(-2, -1))
+    draw = np.trace(matrix, axis1=-2, axis2=-1)
+    team2_win = np.triu(matrix, k=1).sum(axis=(-2, -1))
+    return team1_win, draw, team2_win
+
+
+def over_probability(lambda_team1, lambda_team2, line=2.5):
+    """Probabilidad de que el total de goles supere la línea indicada"""
+    matrix = score_matrix(lambda_team1, lambda_team2)
+    totals = np.add.outer(_GOALS, _GOALS)
+    return np.where(totals > line, matrix, 0.0).sum(axis=(-2, -1))
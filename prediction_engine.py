@@ -0,0 +1,201 @@
+"""
+Motor de Predicción BTTS de Goal2Goal
+Versión en Python (vectorizada con NumPy) de los modelos que calcula el navegador en
+static/js/script.js: lambda de Poisson, Poisson Bivariado, Regresión Logística y la
+reconciliación entre ambos modelos. Los mismos pesos y fórmulas que en el cliente.
+"""
+
+import numpy as np
+
+# Constantes para el modelo de Poisson (enfocado en goles esperados)
+LAMBDA_FACTORS = {
+    'goalsScored': 0.8,
+    'goalsConceded': -0.6,
+    'possession': 0.3,
+    'shotsOnTarget': 0.5,
+    'passingAccuracy': 0.4,
+    'fouls': -0.2,
+    'corners': 0.2,
+    'yellowCards': -0.15,
+    'redCards': -0.4
+}
+
+# Pesos para el modelo de Regresión Logística (BTTS - Both Teams To Score)
+LOGISTIC_WEIGHTS = {
+    'intercept': -0.8,
+    'goalsScored1': 0.45,
+    'goalsScored2': 0.45,
+    'goalsConceded1': 0.35,
+    'goalsConceded2': 0.35,
+    'shotsOnTarget1': 0.08,
+    'shotsOnTarget2': 0.08,
+    'avgGoalsPerMatch': 0.25,
+    'offensiveStrength': 0.15
+}
+
+# Estadísticas obligatorias; las disciplinarias y corners son opcionales (0 = sin ajuste)
+REQUIRED_STATS = ['goalsScored', 'goalsConceded', 'possession', 'shotsOnTarget', 'passingAccuracy']
+OPTIONAL_STATS = ['fouls', 'corners', 'yellowCards', 'redCards']
+
+# Diferencia (en puntos porcentuales) por debajo de la cual ambos modelos están de acuerdo
+CONSENSUS_THRESHOLD = 10
+
+MODEL_CONSENSUS = "Consenso (ambos modelos)"
+MODEL_POISSON = "Poisson Bivariado"
+MODEL_LOGISTIC = "Regresión Logística"
+
+
+def sigmoid(z):
+    """Función sigmoide para regresión logística"""
+    return 1 / (1 + np.exp(-z))
+
+
+def normalize_stats(stats):
+    """
+    Convierte un diccionario de estadísticas (números o listas, uno por partido) en arrays float.
+    Lanza KeyError si falta alguna estadística obligatoria.
+    """
+    normalized = {stat: np.asarray(stats[stat], dtype=float) for stat in REQUIRED_STATS}
+    for stat in OPTIONAL_STATS:
+        normalized[stat] = np.asarray(stats.get(stat, 0), dtype=float)
+    return normalized
+
+
+def calculate_lambda(team_stats, opponent_stats):
+    """Lambda (goles esperados) de un equipo frente a su rival, igual que calculateLambda()"""
+    # Base lambda - promedio de goles históricos del equipo
+    lam = team_stats['goalsScored']
+
+    for stat, factor in LAMBDA_FACTORS.items():
+        if stat == 'goalsScored':
+            continue  # Ya considerado en la base
+
+        if stat in ('possession', 'passingAccuracy'):
+            # Estadísticas relativas: diferencia con el oponente
+            adjustment = (team_stats[stat] - opponent_stats[stat]) / 100 * factor
+        elif stat == 'goalsConceded':
+            # Goles del oponente frente a la defensa propia
+            adjustment = (opponent_stats['goalsScored'] - team_stats['goalsConceded']) / 2 * factor
+        else:
+            adjustment = (team_stats[stat] / 10) * factor
+
+        lam = lam + adjustment
+
+    # Asegurar que lambda sea positiva
+    return np.maximum(0.1, lam)
+
+
+def poisson_btts(lambda1, lambda2, stats1, stats2):
+    """P(Ambos Marcan) en % con Poisson Bivariado y correlación rho por vulnerabilidad defensiva"""
+    avg_defensive_vulnerability = (stats1['goalsConceded'] + stats2['goalsConceded']) / 2
+    rho = np.minimum(0.05 + avg_defensive_vulnerability / 50, 0.20)
+
+    prob_both_zero = np.exp(-lambda1 - lambda2 - rho)
+    prob_team1_zero = np.exp(-lambda1)
+    prob_team2_zero = np.exp(-lambda2)
+
+    return (1 - prob_team1_zero - prob_team2_zero + prob_both_zero) * 100
+
+
+def logistic_btts(stats1, stats2):
+    """P(Ambos Marcan) en % con el modelo de Regresión Logística, igual que calculateLogisticBTTS()"""
+    goals_scored1_norm = np.minimum(stats1['goalsScored'] / 3.0, 1.5)
+    goals_scored2_norm = np.minimum(stats2['goalsScored'] / 3.0, 1.5)
+    goals_conceded1_norm = np.minimum(stats2['goalsConceded'] / 2.5, 1.5)
+    goals_conceded2_norm = np.minimum(stats1['goalsConceded'] / 2.5, 1.5)
+    shots_on_target1_norm = np.minimum(stats1['shotsOnTarget'] / 8.0, 1.5)
+    shots_on_target2_norm = np.minimum(stats2['shotsOnTarget'] / 8.0, 1.5)
+
+    avg_goals_per_match = (stats1['goalsScored'] + stats2['goalsScored']) / 2
+    avg_goals_norm = np.minimum(avg_goals_per_match / 2.5, 1.5)
+
+    offensive_strength = (stats1['goalsScored'] + stats2['goalsScored']) / \
+        (stats1['goalsConceded'] + stats2['goalsConceded'] + 0.5)
+    off_strength_norm = np.minimum(offensive_strength / 2.0, 1.5)
+
+    w = LOGISTIC_WEIGHTS
+    z = (w['intercept']
+         + w['goalsScored1'] * goals_scored1_norm
+         + w['goalsScored2'] * goals_scored2_norm
+         + w['goalsConceded1'] * goals_conceded1_norm
+         + w['goalsConceded2'] * goals_conceded2_norm
+         + w['shotsOnTarget1'] * shots_on_target1_norm
+         + w['shotsOnTarget2'] * shots_on_target2_norm
+         + w['avgGoalsPerMatch'] * avg_goals_norm
+         + w['offensiveStrength'] * off_strength_norm)
+
+    return sigmoid(z) * 100
+
+
+def reconcile_models(btts_poisson, btts_logistic):
+    """
+    Elige la predicción final como en el cliente: consenso si los modelos difieren menos
+    de CONSENSUS_THRESHOLD puntos, si no el modelo con la probabilidad más alta.
+    Devuelve (final, modelo recomendado, confianza, diferencia entre modelos).
+    """
+    diff_models = np.abs(btts_poisson - btts_logistic)
+    consensus = diff_models < CONSENSUS_THRESHOLD
+    poisson_higher = btts_poisson > btts_logistic
+
+    final = np.where(consensus, (btts_poisson + btts_logistic) / 2,
+                     np.where(poisson_higher, btts_poisson, btts_logistic))
+    recommended = np.where(consensus, MODEL_CONSENSUS,
+                           np.where(poisson_higher, MODEL_POISSON, MODEL_LOGISTIC))
+    confidence = np.where(consensus, "Alta", "Media")
+
+    return final, recommended, confidence, diff_models
+
+
+def predict(stats1, stats2):
+    """
+    Ejecuta todos los modelos. Acepta estadísticas escalares (un partido) o arrays
+    (muchos partidos a la vez) y devuelve un diccionario de arrays.
+    """
+    stats1 = normalize_stats(stats1)
+    stats2 = normalize_stats(stats2)
+
+    lambda1 = calculate_lambda(stats1, stats2)
+    lambda2 = calculate_lambda(stats2, stats1)
+
+    btts_p = poisson_btts(lambda1, lambda2, stats1, stats2)
+    btts_l = logistic_btts(stats1, stats2)
+    final, recommended, confidence, diff_models = reconcile_models(btts_p, btts_l)
+
+    return {
+        'lambda1': lambda1,
+        'lambda2': lambda2,
+        'prob_scores1': (1 - np.exp(-lambda1)) * 100,
+        'prob_scores2': (1 - np.exp(-lambda2)) * 100,
+        'poisson': btts_p,
+        'logistic': btts_l,
+        'final': final,
+        'recommended_model': recommended,
+        'confidence': confidence,
+        'diff_models': diff_models
+    }
+
+
+def predict_match(stats1, stats2):
+    """
+    Predicción de un solo partido con el mismo formato que currentResults en el cliente
+    (valores redondeados a 2 decimales)
+    """
+    result = predict(stats1, stats2)
+    return {
+        'team1': {
+            'lambda': round(float(result['lambda1']), 3),
+            'probScores': round(float(result['prob_scores1']), 2)
+        },
+        'team2': {
+            'lambda': round(float(result['lambda2']), 3),
+            'probScores': round(float(result['prob_scores2']), 2)
+        },
+        'btts': {
+            'poisson': round(float(result['poisson']), 2),
+            'logistic': round(float(result['logistic']), 2),
+            'final': round(float(result['final']), 2),
+            'recommendedModel': str(result['recommended_model']),
+            'confidence': str(result['confidence']),
+            'diffModels': round(float(result['diff_models']), 2)
+        }
+    }
@@ -0,0 +1,410 @@
+"""
+Motor de Simulación Monte Carlo para Goal2Goal
+Simulación vectorizada de marcadores con distribuciones de Poisson independientes
+"""
+
+import os
+import secrets
+import threading
+import multiprocessing
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+import poisson_tables
+
+# Promedio típico de goles por equipo
+LEAGUE_AVG_GOALS = 1.5
+
+# Límites razonables para la tasa esperada de goles
+LAMBDA_MIN = 0.5
+LAMBDA_MAX = 4.0
+
+# Tamaño de cada lote de simulación (acota la memoria usada por petición)
+CHUNK_SIZE = 100000
+
+# Máximo de simulaciones aceptadas por petición
+MAX_SIMULATIONS = 20000000
+
+# A partir de este número de simulaciones se reparte el trabajo entre procesos
+PARALLEL_MIN_SIMULATIONS = 500000
+
+# Procesos del pool de simulación por worker web (1 desactiva el paralelismo). Cada worker
+# de gunicorn (WEB_CONCURRENCY) crea su propio pool: por defecto se reparten los núcleos
+# entre ellos, lo que con los perfiles de gunicorn.conf.py (más workers que núcleos) es 1
+SIMULATION_WORKERS = int(os.getenv(
+    'SIMULATION_WORKERS',
+    max(1, (os.cpu_count() or 1) // max(1, int(os.getenv('WEB_CONCURRENCY', 1))))
+))
+
+# Modos disponibles para /monte_carlo
+MODE_SIMULATION = 'simulation'
+MODE_EXACT = 'exact'
+
+
+def compute_lambdas(team1, team2):
+    """
+    Calcula las lambdas (tasa esperada de goles) de ambos equipos.
+    Las estadísticas pueden ser números o arrays de NumPy (un valor por partido).
+    Lambda = (Goles anotados del equipo * Goles concedidos del rival) / Promedio de liga
+    """
+    lambda_team1 = (team1['goalsScored'] * team2['goalsConceded']) / LEAGUE_AVG_GOALS
+    lambda_team2 = (team2['goalsScored'] * team1['goalsConceded']) / LEAGUE_AVG_GOALS
+
+    # Ajustar lambdas con otros factores (posesión, tiros a puerta)
+    possession_factor_t1 = team1['possession'] / 50  # Normalizado a 50%
+    possession_factor_t2 = team2['possession'] / 50
+
+    shots_factor_t1 = team1['shotsOnTarget'] / 5  # Normalizado a 5 tiros
+    shots_factor_t2 = team2['shotsOnTarget'] / 5
+
+    lambda_team1 *= (possession_factor_t1 * 0.3 + shots_factor_t1 * 0.7)
+    lambda_team2 *= (possession_factor_t2 * 0.3 + shots_factor_t2 * 0.7)
+
+    # Asegurar valores mínimos razonables (funciona con escalares y con arrays de partidos)
+    lambda_team1 = np.clip(lambda_team1, LAMBDA_MIN, LAMBDA_MAX)
+    lambda_team2 = np.clip(lambda_team2, LAMBDA_MIN, LAMBDA_MAX)
+
+    return lambda_team1, lambda_team2
+
+
+def simulate_score_matrix(lambda_team1, lambda_team2, n_simulations, rng=None):
+    """
+    Simula n partidos en un solo lote y devuelve la matriz de conteos
+    donde matrix[i, j] es el número de partidos que terminaron i-j
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    goals_t1 = rng.poisson(lambda_team1, n_simulations)
+    goals_t2 = rng.poisson(lambda_team2, n_simulations)
+
+    # Codificar cada marcador como un índice único y contarlos con bincount
+    rows = int(goals_t1.max()) + 1
+    cols = int(goals_t2.max()) + 1
+    score_index = goals_t1 * cols + goals_t2
+
+    counts = np.bincount(score_index, minlength=rows * cols)
+    return counts.reshape(rows, cols)
+
+
+def merge_score_matrices(total, partial):
+    """Suma dos matrices de conteos de marcadores de distinto tamaño"""
+    rows = max(total.shape[0], partial.shape[0])
+    cols = max(total.shape[1], partial.shape[1])
+    merged = np.zeros((rows, cols), dtype=np.int64)
+    merged[:total.shape[0], :total.shape[1]] += total
+    merged[:partial.shape[0], :partial.shape[1]] += partial
+    return merged
+
+
+def btts_confidence_interval(btts_probability, n_simulations):
+    """Intervalo de confianza del 95% (en puntos porcentuales) para la probabilidad BTTS"""
+    btts_std = np.sqrt(btts_probability * (100 - btts_probability) / n_simulations)
+    return max(0, btts_probability - 1.96 * btts_std), min(100, btts_probability + 1.96 * btts_std)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Devuelve el pool de procesos compartido (se crea en el primer uso).
+    Usa 'spawn' para no heredar hilos ni conexiones del proceso web.
+    """
+    global _executor
+    if SIMULATION_WORKERS <= 1:
+        return None
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=SIMULATION_WORKERS,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+
+def reset_executor():
+    """Descarta el pool actual (por ejemplo, si un proceso murió) para recrearlo en el siguiente uso"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def new_seed():
+    """Genera una semilla aleatoria representable sin pérdida en JSON/JavaScript"""
+    return secrets.randbits(52)
+
+
+def _simulate_chunk(args):
+    """Simula un lote con su propio generador (se ejecuta en los procesos del pool)"""
+    lambda_team1, lambda_team2, size, seed_seq = args
+    return simulate_score_matrix(lambda_team1, lambda_team2, size, rng=np.random.default_rng(seed_seq))
+
+
+def _chunk_results(tasks, executor, prefetch):
+    """
+    Resultados de los lotes en orden. Con pool mantiene 'prefetch' lotes en curso por delante
+    del que se consume; al cerrar el generador (parada temprana) cancela los pendientes.
+    """
+    if executor is None:
+        yield from map(_simulate_chunk, tasks)
+        return
+
+    pending = deque()
+    remaining = iter(tasks)
+    try:
+        for task in islice(remaining, prefetch):
+            pending.append(executor.submit(_simulate_chunk, task))
+        while pending:
+            partial = pending.popleft().result()
+            for task in islice(remaining, 1):
+                pending.append(executor.submit(_simulate_chunk, task))
+            yield partial
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def simulate_streaming(lambda_team1, lambda_team2, n_simulations, seed=None,
+                       chunk_size=CHUNK_SIZE, tolerance=None, executor=None, prefetch=None):
+    """
+    Simula en lotes de tamaño fijo acumulando únicamente la matriz de conteos, por lo que
+    la memoria no depende de n_simulations. Cada lote usa un generador independiente derivado
+    de la semilla con SeedSequence.spawn. Si se indica tolerance, se detiene en cuanto el
+    intervalo de confianza de BTTS es más estrecho que ese ancho (en puntos porcentuales).
+    Los lotes se acumulan y la parada se comprueba tras cada uno y en orden, así que para una
+    semilla el resultado es el mismo con o sin pool y sea cual sea su tamaño; con pool se
+    adelantan 'prefetch' lotes (por defecto SIMULATION_WORKERS, todos sin tolerance) y los
+    que quedan tras el punto de parada se descartan.
+    Devuelve la matriz de conteos y el número de simulaciones realizadas.
+    """
+    sizes = [chunk_size] * (n_simulations // chunk_size)
+    if n_simulations % chunk_size:
+        sizes.append(n_simulations % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(lambda_team1, lambda_team2, size, seed_seq) for size, seed_seq in zip(sizes, seeds)]
+
+    if tolerance is None:
+        prefetch = len(tasks)
+    elif prefetch is None:
+        prefetch = max(1, SIMULATION_WORKERS)
+
+    counts = np.zeros((1, 1), dtype=np.int64)
+    completed = 0
+
+    results = _chunk_results(tasks, executor, prefetch)
+    try:
+        for task, partial in zip(tasks, results):
+            counts = merge_score_matrices(counts, partial)
+            completed += task[2]
+
+            if tolerance is not None:
+                btts_probability = (counts[1:, 1:].sum() / completed) * 100
+                ci_lower, ci_upper = btts_confidence_interval(btts_probability, completed)
+                if ci_upper - ci_lower < tolerance:
+                    break
+    finally:
+        results.close()
+
+    return counts, completed
+
+
+def exact_score_matrix(lambda_team1, lambda_team2):
+    """
+    Matriz de probabilidades exactas de cada marcador i-j para dos Poisson independientes,
+    tomada de las tablas precalculadas (0-15 goles) y renormalizada para que sume 1
+    """
+    matrix = poisson_tables.score_matrix(lambda_team1, lambda_team2)
+    return matrix / matrix.sum()
+
+
+def _volatility_info(cv):
+    """Clasifica la volatilidad del partido según el coeficiente de variación"""
+    if cv < 0.5:
+        return "PREDECIBLE", "✅", "Resultados consistentes entre simulaciones"
+    elif cv < 0.8:
+        return "MODERADO", "⚠️", "Variabilidad media en resultados"
+    return "IMPREDECIBLE", "🔥", "Alta variabilidad en resultados"
+
+
+def summarize_score_matrix(counts, n_simulations, lambda_team1, lambda_team2, exact=False):
+    """
+    Construye la respuesta de /monte_carlo a partir de la matriz de conteos de marcadores.
+    En modo exacto los conteos son esperados (probabilidad * n) y el intervalo de confianza
+    se reduce a la propia probabilidad, ya que no hay error de muestreo.
+    """
+    counts = np.asarray(counts, dtype=float)
+
+    def observed(count):
+        # En modo exacto se listan todos los marcadores posibles, sea cual sea n_simulations
+        return count > 0 if exact else round(count) > 0
+
+    rows, cols = counts.shape
+    goals_range_t1 = np.arange(rows)
+    goals_range_t2 = np.arange(cols)
+
+    # Distribuciones marginales y de goles totales
+    team1_dist = counts.sum(axis=1)
+    team2_dist = counts.sum(axis=0)
+    total_index = np.add.outer(goals_range_t1, goals_range_t2)
+    total_dist = np.bincount(total_index.ravel(), weights=counts.ravel(), minlength=rows + cols - 1)
+
+    # Conteos de eventos
+    btts_count = counts[1:, 1:].sum()
+    team1_wins = np.tril(counts, k=-1).sum()
+    team2_wins = np.triu(counts, k=1).sum()
+    over_2_5 = total_dist[3:].sum()
+    under_2_5 = total_dist[:3].sum()
+
+    # Calcular probabilidades
+    btts_probability = float(btts_count / n_simulations) * 100
+    team1_win_prob = float(team1_wins / n_simulations) * 100
+    team2_win_prob = float(team2_wins / n_simulations) * 100
+    draw_prob = float((n_simulations - team1_wins - team2_wins) / n_simulations) * 100
+    over_2_5_prob = float(over_2_5 / n_simulations) * 100
+    under_2_5_prob = float(under_2_5 / n_simulations) * 100
+
+    # Top 10 marcadores más probables
+    flat_counts = counts.ravel()
+    order = np.argsort(-flat_counts, kind='stable')[:10]
+    top_scorelines_formatted = [
+        {
+            'score': f"{idx // cols}-{idx % cols}",
+            'probability': float(flat_counts[idx] / n_simulations) * 100,
+            'count': int(round(flat_counts[idx]))
+        }
+        for idx in order if observed(flat_counts[idx])
+    ]
+
+    # Distribución de goles totales
+    total_goals_formatted = [
+        {
+            'goals': goals,
+            'probability': float(count / n_simulations) * 100,
+            'count': int(round(count))
+        }
+        for goals, count in enumerate(total_dist) if observed(count)
+    ]
+
+    # Estadísticas de goles (media y desviación estándar poblacional)
+    avg_goals_t1 = float(np.dot(goals_range_t1, team1_dist) / n_simulations)
+    avg_goals_t2 = float(np.dot(goals_range_t2, team2_dist) / n_simulations)
+    std_goals_t1 = float(np.sqrt(max(0.0, np.dot(goals_range_t1 ** 2, team1_dist) / n_simulations - avg_goals_t1 ** 2)))
+    std_goals_t2 = float(np.sqrt(max(0.0, np.dot(goals_range_t2 ** 2, team2_dist) / n_simulations - avg_goals_t2 ** 2)))
+    avg_total_goals = avg_goals_t1 + avg_goals_t2
+
+    # Intervalos de confianza (95%)
+    if exact:
+        btts_ci_lower = btts_ci_upper = btts_probability
+    else:
+        btts_ci_lower, btts_ci_upper = btts_confidence_interval(btts_probability, n_simulations)
+
+    # Análisis de volatilidad
+    total_range = np.arange(len(total_dist))
+    volatility = float(np.sqrt(max(0.0, np.dot(total_range ** 2, total_dist) / n_simulations - avg_total_goals ** 2)))
+    cv = volatility / avg_total_goals if avg_total_goals > 0 else 0
+    volatility_label, volatility_icon, volatility_desc = _volatility_info(cv)
+
+    # Respuesta compatible con ambas estructuras (página principal y proceso_calculo)
+    return {
+        'success': True,
+        'mode': MODE_EXACT if exact else MODE_SIMULATION,
+        'simulations': n_simulations,
+        'lambda_team1': round(lambda_team1, 2),
+        'lambda_team2': round(lambda_team2, 2),
+
+        # Estructura para página principal
+        'btts': {
+            'probability': round(btts_probability, 2),
+            'count': int(round(btts_count)),
+            'confidence_interval': {
+                'lower': round(btts_ci_lower, 2),
+                'upper': round(btts_ci_upper, 2)
+            }
+        },
+        'results': {
+            'team1_win': round(team1_win_prob, 2),
+            'team2_win': round(team2_win_prob, 2),
+            'draw': round(draw_prob, 2)
+        },
+        'goals': {
+            'team1_avg': round(avg_goals_t1, 2),
+            'team2_avg': round(avg_goals_t2, 2),
+            'team1_std': round(std_goals_t1, 2),
+            'team2_std': round(std_goals_t2, 2),
+            'total_avg': round(avg_total_goals, 2)
+        },
+        'over_under': {
+            'over_2_5': round(over_2_5_prob, 2),
+            'under_2_5': round(under_2_5_prob, 2)
+        },
+        'top_scorelines': top_scorelines_formatted,
+        'total_goals_distribution': total_goals_formatted,
+        'volatility': {
+            'value': round(volatility, 2),
+            'coefficient': round(cv, 2),
+            'label': volatility_label,
+            'icon': volatility_icon,
+            'description': volatility_desc
+        },
+
+        # Estructura alternativa plana (para proceso_calculo.html)
+        'btts_probability': round(btts_probability, 2),
+        'confidence_interval': [round(btts_ci_lower, 2), round(btts_ci_upper, 2)],
+        'team1_win_probability': round(team1_win_prob, 2),
+        'team2_win_probability': round(team2_win_prob, 2),
+        'draw_probability': round(draw_prob, 2),
+        'expected_goals_team1': round(avg_goals_t1, 2),
+        'expected_goals_team2': round(avg_goals_t2, 2),
+        'std_goals_team1': round(std_goals_t1, 2),
+        'std_goals_team2': round(std_goals_t2, 2),
+        'over_2_5_probability': round(over_2_5_prob, 2),
+        'under_2_5_probability': round(under_2_5_prob, 2)
+    }
+
+
+def quantize_lambdas(lambda_team1, lambda_team2, precision=2):
+    """Redondea las lambdas a la precisión indicada (la que se usa como clave de caché)"""
+    return round(float(lambda_team1), precision), round(float(lambda_team2), precision)
+
+
+def run_monte_carlo(lambda_team1, lambda_team2, n_simulations, seed=None, tolerance=None):
+    """
+    Simula los partidos por lotes y devuelve la respuesta completa.
+    'simulations' refleja las simulaciones realmente usadas (menos si hubo parada temprana)
+    y 'seed' permite reproducir exactamente el mismo resultado.
+    """
+    if seed is None:
+        seed = new_seed()
+
+    executor = get_executor() if n_simulations >= PARALLEL_MIN_SIMULATIONS else None
+    try:
+        counts, completed = simulate_streaming(lambda_team1, lambda_team2, n_simulations,
+                                               seed=seed, tolerance=tolerance, executor=executor)
+    except BrokenProcessPool:
+        # Misma semilla y mismos lotes: el resultado en este proceso es idéntico
+        reset_executor()
+        counts, completed = simulate_streaming(lambda_team1, lambda_team2, n_simulations,
+                                               seed=seed, tolerance=tolerance)
+
+    response = summarize_score_matrix(counts, completed, lambda_team1, lambda_team2)
+    response['simulations_requested'] = n_simulations
+    response['stopped_early'] = completed < n_simulations
+    response['seed'] = seed
+    return response
+
+
+def run_exact(lambda_team1, lambda_team2, n_simulations):
+    """
+    Calcula la misma respuesta que run_monte_carlo de forma analítica, a partir de la
+    matriz exacta de probabilidades. Los conteos se expresan como esperados sobre n_simulations.
+    """
+    probabilities = exact_score_matrix(lambda_team1, lambda_team2)
+    return summarize_score_matrix(probabilities * n_simulations, n_simulations,
+                                  lambda_team1, lambda_team2, exact=True)
@@ -55,7 +55,7 @@ echo.
 
 REM Verificar app
 echo 📱 Verificando app.py...
-python -c "from app import app, db; print('✓ App OK')"
+python -c "from app import create_app, db; create_app(); print('✓ App OK')"
 echo.
 
 echo ========================================
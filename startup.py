@@ -0,0 +1,99 @@
+"""
+Arranque de Goal2Goal
+Importación diferida de las dependencias pesadas (NumPy, matplotlib y los módulos que
+las usan): un worker que solo sirve /login o /dashboard no paga su coste de carga.
+Con PRELOAD_MODULES=1 se cargan todas al importar la app (p. ej. en el proceso maestro
+de gunicorn con preload_app, antes de hacer fork). Con STARTUP_TIMING=1 se registra el
+tiempo de importación de cada módulo.
+
+Medir el coste de importación por módulo:
+    python startup.py
+"""
+
+import os
+import sys
+import time
+import logging
+import importlib
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Módulos pesados que la app carga bajo demanda (en orden de dependencia)
+HEAVY_MODULES = ['numpy', 'poisson_tables', 'prediction_engine', 'simulation', 'matplotlib', 'charts']
+
+
+def timing_enabled():
+    return os.getenv('STARTUP_TIMING', '').lower() in ('1', 'true', 'yes')
+
+
+def timed_import(name):
+    """Importa un módulo y devuelve (módulo, segundos); 0 si ya estaba cargado"""
+    if name in sys.modules:
+        return sys.modules[name], 0.0
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    return module, time.perf_counter() - started
+
+
+class LazyModule:
+    """
+    Sustituto de un módulo que lo importa en el primer acceso a un atributo:
+    np = LazyModule('numpy') se usa igual que import numpy as np
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                module, elapsed = timed_import(self._name)
+                if timing_enabled() and elapsed:
+                    logger.info(f"⏱️ Importación diferida de {self._name}: {elapsed * 1000:.1f} ms")
+                self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        module = self._module or self._load()
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = 'cargado' if self._module is not None else 'sin cargar'
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def preload(modules=HEAVY_MODULES):
+    """Importa ya todos los módulos pesados y devuelve [(nombre, segundos)]"""
+    timings = []
+    for name in modules:
+        _, elapsed = timed_import(name)
+        timings.append((name, elapsed))
+        if timing_enabled():
+            logger.info(f"⏱️ Precarga de {name}: {elapsed * 1000:.1f} ms")
+    return timings
+
+
+def preload_enabled():
+    return os.getenv('PRELOAD_MODULES', '').lower() in ('1', 'true', 'yes')
+
+
+def main():
+    """Informe del coste de importación: la app (sin módulos pesados) y cada módulo pesado"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.environ.pop('PRELOAD_MODULES', None)
+
+    _, app_elapsed = timed_import('app')
+    rows = [('app', app_elapsed)] + preload()
+
+    print(f"{'Módulo':<20}{'ms':>10}")
+    for name, elapsed in rows:
+        print(f"{name:<20}{elapsed * 1000:>10.1f}")
+    print(f"{'Total':<20}{sum(elapsed for _, elapsed in rows) * 1000:>10.1f}")
+    print("Detalle por submódulo: python -X importtime -c 'import app'")
+
+
+if __name__ == '__main__':
+    main()
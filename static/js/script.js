@@ -949,6 +949,61 @@ function createComparisonChart(team1, team2, stats1, stats2) {
     });
 }
 
+// Lee la respuesta Server-Sent Events de /get_explanation/stream y llama a onUpdate
+// con el HTML acumulado (agrupando los repintados por frame)
+async function readExplanationStream(response, onUpdate) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let rawHtml = '';
+    let renderPending = false;
+
+    const stripCodeFence = (html) => html.replace(/^\s*```(html)?/, '').replace(/```\s*$/, '');
+    const scheduleRender = () => {
+        if (renderPending) return;
+        renderPending = true;
+        requestAnimationFrame(() => {
+            renderPending = false;
+            onUpdate(stripCodeFence(rawHtml));
+        });
+    };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Los eventos SSE se separan con una línea en blanco
+        let separatorIndex;
+        while ((separatorIndex = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, separatorIndex);
+            buffer = buffer.slice(separatorIndex + 2);
+
+            let eventName = 'message';
+            let eventData = '';
+            for (const line of rawEvent.split('\n')) {
+                if (line.startsWith('event: ')) eventName = line.slice(7);
+                else if (line.startsWith('data: ')) eventData += line.slice(6);
+            }
+            if (!eventData) continue;
+            const payload = JSON.parse(eventData);
+
+            if (eventName === 'chunk') {
+                rawHtml += payload.html;
+                scheduleRender();
+            } else if (eventName === 'done') {
+                renderPending = true;  // Evitar que un repintado pendiente sobrescriba el resultado final
+                onUpdate(payload.explanation);
+                return payload.explanation;
+            } else if (eventName === 'error') {
+                throw new Error(payload.error);
+            }
+        }
+    }
+
+    throw new Error('La conexión se cerró antes de completar el análisis');
+}
+
 // Función para mostrar la explicación de IA con efecto de tipeo
 async function showAIExplanation() {
     if (!currentResults) {
@@ -982,7 +1037,8 @@ async function showAIExplanation() {
         const controller = new AbortController();
         const timeoutId = setTimeout(() => controller.abort(), 120000); // 2 minutos
 
-        const response = await fetch('/get_explanation', {
+        // Pedir la explicación en streaming para mostrarla mientras se genera
+        const response = await fetch('/get_explanation/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -991,27 +1047,15 @@ async function showAIExplanation() {
             signal: controller.signal
         });
 
-        clearTimeout(timeoutId);
-
         if (!response.ok) {
-            throw new Error(`Error del servidor (${response.status}): Por favor, intenta nuevamente`);
+            clearTimeout(timeoutId);
+            let serverError = null;
+            try {
+                serverError = (await response.json()).error;
+            } catch (e) { /* respuesta sin JSON */ }
+            throw new Error(serverError || `Error del servidor (${response.status}): Por favor, intenta nuevamente`);
         }
 
-        const data = await response.json();
-
-        if (!data.explanation && !data.error) {
-            throw new Error('Formato de respuesta inesperado del servidor');
-        }
-
-        if (data.error) {
-            throw new Error(data.error);
-        }
-
-        loadingIndicator.style.display = 'none';
-
-        // Mostrar la explicación HTML directamente (la IA devuelve HTML formateado)
-        explanationDiv.innerHTML = data.explanation;
-
         // Aplicar estilos mejorados para mejor visualización
         explanationDiv.style.lineHeight = '1.7';
         explanationDiv.style.fontSize = '1.05rem';
@@ -1020,8 +1064,13 @@ async function showAIExplanation() {
         explanationDiv.style.borderRadius = '12px';
         explanationDiv.style.boxShadow = '0 8px 25px rgba(0, 0, 0, 0.5)';
 
-        // Scroll al inicio con animación suave
-        explanationDiv.scrollTo({top: 0, behavior: 'smooth'});
+        // Mostrar la explicación HTML directamente (la IA devuelve HTML formateado)
+        await readExplanationStream(response, (html) => {
+            loadingIndicator.style.display = 'none';
+            explanationDiv.innerHTML = html;
+        });
+
+        clearTimeout(timeoutId);
 
     } catch (error) {
         loadingIndicator.style.display = 'none';
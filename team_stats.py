@@ -0,0 +1,237 @@
+"""
+Estadísticas de equipos de Goal2Goal
+Servicio sobre la tabla team_stats_cache con dos niveles, por nombre normalizado:
+  1. LRU en memoria por proceso (TTLCache)
+  2. MySQL (team_stats_cache)
+Las filas caducadas (TeamStatsCache.is_expired) se sirven igualmente y se refrescan en un
+hilo de fondo (stale-while-revalidate). Un equipo que no está en ningún nivel también se
+calcula en segundo plano: la petición nunca lanza la consulta de estimación, responde que
+está pendiente y el cliente vuelve a preguntar.
+
+Sin proveedor externo, las estadísticas se estiman ('Estimated') a partir de las que los
+usuarios introdujeron para ese equipo en sus predicciones recientes. Otro origen (FBref,
+SofaScore...) se conecta pasando fetcher=función(nombre) -> dict de columnas o None.
+"""
+
+import os
+import time
+import logging
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select, func, union_all
+from sqlalchemy.exc import IntegrityError
+
+from cache import TTLCache
+from models import db, Prediction, TeamStatsCache
+
+logger = logging.getLogger(__name__)
+
+SOURCE_ESTIMATED = 'Estimated'
+
+# Columnas de estadísticas comunes a predictions (team1_* / team2_*) y team_stats_cache
+STAT_COLUMNS = ['goals_scored', 'goals_conceded', 'possession', 'shots_on_target', 'passing_accuracy']
+
+# Predicciones que se tienen en cuenta al estimar (rango sobre el índice de created_at)
+ESTIMATE_WINDOW_DAYS = 90
+
+MAX_NAME_LENGTH = 100
+
+
+def normalize_name(name):
+    """'  Atlético   de Madrid ' -> 'atletico de madrid'"""
+    decomposed = unicodedata.normalize('NFKD', name)
+    without_accents = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(without_accents.lower().split())
+
+
+def estimate_query(name, since):
+    """Media de cada estadística del equipo (como local o visitante) en las predicciones desde 'since'"""
+    table = Prediction.__table__
+    sides = union_all(*[
+        select(*[table.c[f"{side}_{column}"].label(column) for column in STAT_COLUMNS])
+        .where(table.c.created_at >= since, table.c[f"{side}_name"] == name)
+        for side in ('team1', 'team2')
+    ]).subquery()
+    return select(func.count().label('samples'), *[func.avg(sides.c[column]).label(column) for column in STAT_COLUMNS])
+
+
+def estimate_from_predictions(name):
+    """
+    Estadísticas estimadas con las introducidas para el equipo en las predicciones de los
+    últimos ESTIMATE_WINDOW_DAYS días. None si no aparece. El nombre se compara con la
+    colación de la tabla (utf8mb4_unicode_ci en MySQL: sin distinguir mayúsculas ni acentos).
+    """
+    since = datetime.utcnow() - timedelta(days=ESTIMATE_WINDOW_DAYS)
+    row = db.session.execute(estimate_query(name, since)).first()
+    if not row.samples:
+        return None
+    stats = {column: round(float(getattr(row, column) or 0), 2) for column in STAT_COLUMNS}
+    stats['source'] = SOURCE_ESTIMATED
+    return stats
+
+
+def lookup_query(key):
+    """Fila de team_stats_cache por nombre normalizado (índice de team_name_normalized)"""
+    return select(TeamStatsCache).where(TeamStatsCache.team_name_normalized == key).limit(1)
+
+
+def entry_of(row, max_age_days):
+    """Entrada de la caché en memoria a partir de una fila de team_stats_cache"""
+    return {
+        'team': row.to_dict(),
+        'source': row.source,
+        'last_updated': row.last_updated.strftime('%Y-%m-%d %H:%M:%S') if row.last_updated else None,
+        'stale': row.is_expired(days=max_age_days)
+    }
+
+
+class TeamStatsService:
+    """
+    Búsqueda de estadísticas por nombre de equipo: memoria -> MySQL -> fetcher.
+    Los refrescos en segundo plano necesitan init_app(app) para abrir un contexto de la app.
+    """
+
+    def __init__(self, max_entries=2048, ttl=600, max_age_days=7, fetcher=None,
+                 refresh_workers=2, retry_interval=60, max_pending=32):
+        self.max_age_days = max_age_days
+        self.fetcher = fetcher or estimate_from_predictions
+        self.refresh_workers = refresh_workers
+        self.retry_interval = retry_interval
+        # Refrescos en cola como máximo: nombres inventados no pueden encolar consultas sin fin
+        self.max_pending = max_pending
+        self.cache = TTLCache(max_entries=max_entries, ttl=ttl)
+        # Equipos sin datos en ningún origen: no se reintenta en cada petición
+        self.missing = TTLCache(max_entries=max_entries, ttl=retry_interval)
+        self.refreshed = 0
+        self.failed_refreshes = 0
+        self._refreshing = set()
+        self._next_attempt = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._app = None
+
+    def init_app(self, app):
+        self._app = app
+
+    def _key(self, name):
+        key = normalize_name(name)
+        if not key or max(len(key), len(name.strip())) > MAX_NAME_LENGTH:
+            raise ValueError(f"Nombre de equipo no válido: {name!r}")
+        return key
+
+    def get(self, name):
+        """
+        {'team', 'source', 'last_updated', 'stale'} del equipo o None si todavía no hay datos.
+        Un equipo desconocido se calcula en segundo plano (ver pending()).
+        Lanza ValueError si el nombre está vacío o es demasiado largo.
+        """
+        key = self._key(name)
+
+        entry = self.cache.get(key)
+        if entry is None:
+            if self.missing.get(key):
+                return None
+            row = self._find(key)
+            if row is None:
+                self._schedule_refresh(name.strip(), key)
+                return None
+            entry = entry_of(row, self.max_age_days)
+            self.cache.set(key, entry)
+
+        if entry['stale']:
+            self._schedule_refresh(entry['team']['name'], key)
+        return entry
+
+    def pending(self, name):
+        """True si las estadísticas del equipo se están calculando en segundo plano"""
+        key = self._key(name)
+        with self._lock:
+            return key in self._refreshing
+
+    def _find(self, key):
+        return db.session.execute(lookup_query(key)).scalar()
+
+    def _refresh(self, name, key):
+        """Pide las estadísticas al fetcher y las guarda en MySQL y en memoria"""
+        stats = self.fetcher(name)
+        if stats is None:
+            return None
+
+        row = self._find(key)
+        if row is None:
+            row = TeamStatsCache(team_name=name, team_name_normalized=key, created_at=datetime.utcnow())
+            db.session.add(row)
+        for column, value in stats.items():
+            setattr(row, column, value)
+        row.last_updated = datetime.utcnow()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Otro worker creó el equipo a la vez: nos quedamos con su fila
+            db.session.rollback()
+            row = self._find(key)
+            if row is None:
+                return None
+
+        entry = entry_of(row, self.max_age_days)
+        self.cache.set(key, entry)
+        self.missing.delete(key)
+        return entry
+
+    def _schedule_refresh(self, name, key):
+        now = time.monotonic()
+        with self._lock:
+            if (key in self._refreshing or self._next_attempt.get(key, 0) > now or self._app is None
+                    or len(self._refreshing) >= self.max_pending):
+                return
+            self._refreshing.add(key)
+            self._next_attempt[key] = now + self.retry_interval
+            # Los hilos no sobreviven al fork de los workers de gunicorn (preload_app)
+            if self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.refresh_workers,
+                                                    thread_name_prefix='team-stats')
+                self._pid = os.getpid()
+            executor = self._executor
+        executor.submit(self._background_refresh, name, key)
+
+    def _background_refresh(self, name, key):
+        try:
+            with self._app.app_context():
+                row = self._find(key)
+                if row is not None and not row.is_expired(days=self.max_age_days):
+                    # Ya lo refrescó otro worker: basta con actualizar la memoria
+                    self.cache.set(key, entry_of(row, self.max_age_days))
+                elif self._refresh(name, key) is None:
+                    if row is None:
+                        # Equipo sin datos en ningún origen: no se reintenta hasta que caduque
+                        self.missing.set(key, True)
+                    else:
+                        logger.warning(f"⚠️ Sin datos nuevos para {name}: se siguen sirviendo los anteriores")
+                    return
+            with self._lock:
+                self.refreshed += 1
+            logger.info(f"🔄 Estadísticas de {name} refrescadas")
+        except Exception as e:
+            with self._lock:
+                self.failed_refreshes += 1
+            logger.error(f"❌ Error al refrescar las estadísticas de {name}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+                # Limpieza de los reintentos ya vencidos
+                now = time.monotonic()
+                self._next_attempt = {k: t for k, t in self._next_attempt.items() if t > now}
+
+    def stats(self):
+        with self._lock:
+            status = {
+                'refreshing': len(self._refreshing),
+                'refreshed': self.refreshed,
+                'failed_refreshes': self.failed_refreshes,
+                'max_age_days': self.max_age_days
+            }
+        return dict(self.cache.stats(), missing=self.missing.stats()['entries'], **status)
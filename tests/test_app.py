@@ -0,0 +1,31 @@
+"""
+Pruebas de la aplicación Flask sobre SQLite en memoria (sin MySQL)
+"""
+
+from app import create_app
+from models import db
+from database import engine_options
+
+
+def test_engine_options_only_tune_mysql_pool():
+    assert engine_options('sqlite://') == {}
+    assert engine_options('mysql+pymysql://root:@localhost:3306/goal2goal_db')['pool_size'] > 0
+
+
+def test_create_app_starts_on_sqlite():
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'TESTING': True})
+    with app.app_context():
+        db.create_all()
+    response = app.test_client().get('/ruta-que-no-existe')
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "Ruta no encontrada"}
+
+
+def test_monte_carlo_routes_reject_null_body_with_400():
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'TESTING': True, 'LOGIN_DISABLED': True})
+    client = app.test_client()
+    for url in ('/monte_carlo', '/jobs/monte_carlo'):
+        for body in ('null', '[1, 2]'):
+            response = client.post(url, data=body, content_type='application/json')
+            assert response.status_code == 400, (url, body)
+            assert response.get_json()['success'] is False
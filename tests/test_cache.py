@@ -0,0 +1,31 @@
+"""
+Pruebas de las cachés en memoria y en disco
+"""
+
+import os
+import time
+
+from cache import FileStore
+
+
+def test_file_store_reads_do_not_extend_ttl(tmp_path):
+    store = FileStore(str(tmp_path), ttl=1, max_entries=10)
+    store.set('grafico', b'png')
+    written = time.time()
+    # Lecturas frecuentes: renuevan la fecha del archivo (LRU) pero no la caducidad
+    while time.time() - written < 1.2:
+        assert store.get('grafico') in (b'png', None)
+        time.sleep(0.1)
+    assert store.get('grafico') is None
+
+
+def test_file_store_prunes_least_recently_used(tmp_path):
+    store = FileStore(str(tmp_path), ttl=3600, max_entries=2, prune_interval=0)
+    store.set('a', 1)
+    os.utime(store._path('a'), (time.time() - 30, time.time() - 30))
+    store.set('b', 2)
+    os.utime(store._path('b'), (time.time() - 20, time.time() - 20))
+    assert store.get('a') == 1
+    store.set('c', 3)
+    assert store.get('b') is None
+    assert store.get('a') == 1 and store.get('c') == 3
@@ -0,0 +1,22 @@
+"""
+Pruebas de los datos del gráfico comparativo para Chart.js
+"""
+
+import charts
+
+
+def test_chart_data_uses_chart_js_dataset_options():
+    data = charts.comparison_chart_data('Local', 'Visitante', [1, 2, 3, 4, 5], [5, 4, 3, 2, 1])
+
+    assert data['labels'] == charts.CHART_LABELS
+    team1, team2 = data['datasets']
+    assert team1 == {
+        'label': 'Local',
+        'data': [1, 2, 3, 4, 5],
+        'backgroundColor': 'rgba(54, 162, 235, 0.7)',
+        'borderColor': 'rgba(54, 162, 235, 1)',
+        'borderWidth': 1
+    }
+    assert team2['backgroundColor'] == 'rgba(255, 99, 132, 0.7)'
+    assert team2['borderColor'] == 'rgba(255, 99, 132, 1)'
+    assert 'color' not in team1
@@ -0,0 +1,27 @@
+"""
+Pruebas del circuit breaker de OpenRouterClient (sin llamadas de red)
+"""
+
+import asyncio
+
+from llm_client import OpenRouterClient, ModelHealthTracker, CircuitBreaker
+
+
+def test_cancelled_probe_before_start_releases_half_open_breaker():
+    health = ModelHealthTracker(failure_threshold=1, cooldown=0)
+    health.record_failure('modelo', 1.0)
+    client = OpenRouterClient('http://localhost', 'clave', health=health)
+
+    async def launch_and_cancel():
+        assert health.allow_request('modelo')
+        task = client._launch_tracked('modelo', {})
+        # Se cancela antes de que la corrutina llegue a ejecutarse
+        task.cancel()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+    asyncio.run(launch_and_cancel())
+    breaker = health._breakers['modelo']
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.probe_in_flight
+    assert health.allow_request('modelo')
@@ -0,0 +1,24 @@
+"""
+Pruebas del motor de simulación Monte Carlo
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import simulation
+
+
+def test_early_stop_does_not_depend_on_pool_size():
+    kwargs = dict(seed=7, tolerance=0.3, chunk_size=100000)
+    counts, completed = simulation.simulate_streaming(1.6, 1.2, 2000000, **kwargs)
+    assert completed < 2000000
+
+    with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context('spawn')) as executor:
+        for prefetch in (2, 4):
+            pooled_counts, pooled_completed = simulation.simulate_streaming(
+                1.6, 1.2, 2000000, executor=executor, prefetch=prefetch, **kwargs)
+            assert pooled_completed == completed
+            np.testing.assert_array_equal(pooled_counts, counts)
+
@@ -0,0 +1,38 @@
+"""
+Pruebas de TeamStatsService sobre SQLite
+"""
+
+import threading
+
+from app import create_app
+from models import db
+from team_stats import TeamStatsService
+
+
+def test_unknown_team_is_computed_in_background():
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:', 'TESTING': True})
+    started = threading.Event()
+    release = threading.Event()
+    request_thread = threading.get_ident()
+    calls = []
+
+    def fetcher(name):
+        calls.append(threading.get_ident())
+        started.set()
+        release.wait(5)
+        return {'goals_scored': 1.5, 'source': 'Test'}
+
+    service = TeamStatsService(fetcher=fetcher)
+    service.init_app(app)
+    with app.app_context():
+        db.create_all()
+        assert service.get('Real Madrid') is None
+        assert started.wait(5)
+        assert service.pending('real  madrid')
+        release.set()
+        service._executor.shutdown(wait=True)
+
+        entry = service.get('Real Madrid')
+        assert entry['team']['goalsScored'] == 1.5
+        assert not service.pending('Real Madrid')
+    assert calls and request_thread not in calls
@@ -0,0 +1,119 @@
+"""
+Caché de identidad de usuarios para Flask-Login
+load_user() se ejecuta en cada petición autenticada. En lugar de un SELECT por petición,
+la identidad mínima (id, usuario, activo) se resuelve en este orden:
+  1. caché en memoria con TTL corto (y segundo nivel compartido opcional)
+  2. la sesión firmada del usuario, si se verificó contra MySQL hace menos de TTL segundos
+  3. MySQL (y se refrescan la caché y la sesión)
+Se invalida al iniciar y cerrar sesión y al desactivar un usuario.
+"""
+
+import time
+
+from flask import has_request_context, session
+from flask_login import UserMixin
+from sqlalchemy import event, inspect
+
+from cache import TTLCache
+from models import db, User
+
+# Clave de la sesión con la identidad compacta: [id, usuario, verificado_en]
+SESSION_KEY = 'auth'
+
+
+class UserIdentity(UserMixin):
+    """
+    Usuario autenticado sin objeto ORM: basta para current_user.id / .username.
+    Cualquier otro atributo carga el User completo desde la base de datos.
+    """
+
+    def __init__(self, id, username, active=True):
+        self.id = id
+        self.username = username
+        self.active = active
+        self._user = None
+
+    @property
+    def is_active(self):
+        return self.active
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if self._user is None:
+            self._user = db.session.get(User, self.id)
+        return getattr(self._user, name)
+
+
+def identity_of(user):
+    return {'id': user.id, 'username': user.username, 'active': bool(user.is_active)}
+
+
+class UserCache:
+    """Resuelve load_user() sin ir a MySQL mientras la identidad siga siendo reciente"""
+
+    def __init__(self, ttl=60, max_entries=4096, store=None):
+        self.ttl = ttl
+        self.cache = TTLCache(max_entries=max_entries, ttl=ttl, store=store)
+
+    @staticmethod
+    def _key(user_id):
+        return f"user-{int(user_id)}"
+
+    def _from_session(self, user_id):
+        auth = session.get(SESSION_KEY) if has_request_context() else None
+        if auth and auth[0] == user_id and time.time() - auth[2] < self.ttl:
+            return {'id': auth[0], 'username': auth[1], 'active': True}
+        return None
+
+    def _remember_session(self, identity):
+        if has_request_context():
+            session[SESSION_KEY] = [identity['id'], identity['username'], int(time.time())]
+
+    def load(self, user_id):
+        """Identidad del usuario, o None si no existe o está desactivado"""
+        user_id = int(user_id)
+        identity = self.cache.get(self._key(user_id))
+        if identity is None:
+            identity = self._from_session(user_id)
+            if identity is None:
+                user = db.session.get(User, user_id)
+                if user is None:
+                    return None
+                identity = identity_of(user)
+                if identity['active']:
+                    self._remember_session(identity)
+            self.cache.set(self._key(user_id), identity)
+
+        if not identity['active']:
+            return None
+        return UserIdentity(**identity)
+
+    def on_login(self, user):
+        """Tras login_user(): identidad recién verificada en caché y en la sesión"""
+        identity = identity_of(user)
+        self.cache.set(self._key(user.id), identity)
+        self._remember_session(identity)
+
+    def on_logout(self, user_id):
+        self.cache.delete(self._key(user_id))
+        if has_request_context():
+            session.pop(SESSION_KEY, None)
+
+    def revoke(self, user):
+        """
+        Marca al usuario como inactivo durante TTL segundos: cubre las sesiones que
+        se verificaron justo antes de la desactivación
+        """
+        self.cache.set(self._key(user.id), dict(identity_of(user), active=False))
+
+    def listen_for_deactivation(self):
+        """Revoca (o rehabilita) automáticamente a los usuarios cuyo is_active cambie a través del ORM"""
+        @event.listens_for(User, 'after_update')
+        def refresh_if_activation_changed(mapper, connection, target):
+            if not inspect(target).attrs.is_active.history.has_changes():
+                return
+            if target.is_active:
+                self.cache.delete(self._key(target.id))
+            else:
+                self.revoke(target)
@@ -0,0 +1,160 @@
+"""
+Estadísticas de predicciones por usuario de Goal2Goal
+La tabla user_prediction_stats guarda por usuario el número de predicciones, la suma de
+cada probabilidad BTTS y el reparto por modelo recomendado y nivel de confianza. Se
+actualiza en la misma transacción que cada INSERT o DELETE en predictions, así que el
+dashboard obtiene sus agregados con una búsqueda por clave primaria en lugar de recorrer
+el historial. rebuild() los recalcula desde predictions (alta de la tabla o reparación).
+
+Las inserciones con Core (save_prediction, el buffer write-behind, predict_batch) no
+disparan eventos del ORM: esas rutas llaman a record_inserted() explícitamente.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import select, insert, update, delete, func, case, literal, event
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from models import Prediction, UserPredictionStats
+
+stats_table = UserPredictionStats.__table__
+
+# Valores de recommended_model (los MODEL_* de prediction_engine, copiados para no importar NumPy)
+MODEL_COLUMNS = {
+    'Consenso (ambos modelos)': 'model_consensus',
+    'Poisson Bivariado': 'model_poisson',
+    'Regresión Logística': 'model_logistic'
+}
+CONFIDENCE_COLUMNS = {
+    'Alta': 'confidence_high',
+    'Media': 'confidence_medium',
+    'Baja': 'confidence_low'
+}
+# Columna de predictions -> columna con su suma
+SUM_COLUMNS = {
+    'poisson_btts': 'poisson_btts_sum',
+    'logistic_btts': 'logistic_btts_sum',
+    'final_btts': 'final_btts_sum'
+}
+COUNTER_COLUMNS = (['prediction_count'] + list(SUM_COLUMNS.values()) +
+                   list(MODEL_COLUMNS.values()) + ['model_other'] +
+                   list(CONFIDENCE_COLUMNS.values()) + ['confidence_other'])
+
+# Columnas de predictions que necesitan los agregados
+SOURCE_COLUMNS = ['user_id', 'recommended_model', 'confidence_level'] + list(SUM_COLUMNS)
+
+
+def _number(value):
+    # Decimal para que las sumas DECIMAL(14, 2) no acumulen error de coma flotante
+    return Decimal(str(value)) if value is not None else Decimal(0)
+
+
+def row_deltas(rows, sign=1):
+    """Incrementos por usuario para un grupo de filas de predictions (sign=-1 al borrarlas)"""
+    deltas = defaultdict(lambda: dict.fromkeys(COUNTER_COLUMNS, 0))
+    for row in rows:
+        delta = deltas[row['user_id']]
+        delta['prediction_count'] += sign
+        for column, total in SUM_COLUMNS.items():
+            delta[total] += sign * _number(row.get(column))
+        delta[MODEL_COLUMNS.get(row.get('recommended_model'), 'model_other')] += sign
+        delta[CONFIDENCE_COLUMNS.get(row.get('confidence_level'), 'confidence_other')] += sign
+    return deltas
+
+
+def apply_deltas(connection, deltas):
+    """Suma los incrementos a la fila de cada usuario (la crea si no existe)"""
+    now = datetime.utcnow()
+    for user_id, delta in deltas.items():
+        if connection.dialect.name == 'mysql':
+            # Un único INSERT ... ON DUPLICATE KEY UPDATE: sin carrera entre procesos
+            statement = mysql_insert(stats_table).values(user_id=user_id, updated_at=now, **delta)
+            increments = {column: stats_table.c[column] + statement.inserted[column] for column in COUNTER_COLUMNS}
+            connection.execute(statement.on_duplicate_key_update(updated_at=now, **increments))
+        else:
+            increments = {column: stats_table.c[column] + delta[column] for column in COUNTER_COLUMNS}
+            result = connection.execute(
+                update(stats_table).where(stats_table.c.user_id == user_id).values(updated_at=now, **increments)
+            )
+            if result.rowcount == 0:
+                connection.execute(insert(stats_table).values(user_id=user_id, updated_at=now, **delta))
+
+
+def record_inserted(connection, rows):
+    """Tras insertar filas en predictions (dicts columna -> valor), en la misma transacción"""
+    apply_deltas(connection, row_deltas(rows))
+
+
+def record_deleted(connection, rows):
+    """Tras borrar filas de predictions, en la misma transacción"""
+    apply_deltas(connection, row_deltas(rows, sign=-1))
+
+
+def _source_row(prediction):
+    return {column: getattr(prediction, column) for column in SOURCE_COLUMNS}
+
+
+def listen_for_orm_changes():
+    """Mantiene los agregados cuando las predicciones se insertan o borran a través del ORM"""
+    @event.listens_for(Prediction, 'after_insert')
+    def count_inserted(mapper, connection, target):
+        record_inserted(connection, [_source_row(target)])
+
+    @event.listens_for(Prediction, 'after_delete')
+    def count_deleted(mapper, connection, target):
+        record_deleted(connection, [_source_row(target)])
+
+
+def stats_query(user_id):
+    """SELECT por clave primaria de los agregados de un usuario"""
+    return select(stats_table).where(stats_table.c.user_id == user_id)
+
+
+def summarize(row):
+    """Agregados para el dashboard y la API a partir de la fila de stats_query() (o None)"""
+    count = row.prediction_count if row else 0
+
+    def average(total):
+        return round(float(getattr(row, total)) / count, 2) if count else 0
+
+    return {
+        'count': count,
+        'avg_btts': {
+            'poisson': average('poisson_btts_sum'),
+            'logistic': average('logistic_btts_sum'),
+            'final': average('final_btts_sum')
+        },
+        'models': dict(
+            {value: getattr(row, column) if row else 0 for value, column in MODEL_COLUMNS.items()},
+            Otro=row.model_other if row else 0
+        ),
+        'confidence': dict(
+            {value: getattr(row, column) if row else 0 for value, column in CONFIDENCE_COLUMNS.items()},
+            Otra=row.confidence_other if row else 0
+        )
+    }
+
+
+def rebuild(connection, user_id=None):
+    """Recalcula los agregados desde predictions (de todos los usuarios o de uno)"""
+    columns = [Prediction.user_id, func.count().label('prediction_count')]
+    for column, total in SUM_COLUMNS.items():
+        columns.append(func.coalesce(func.sum(Prediction.__table__.c[column]), 0).label(total))
+    for buckets, source, other in ((MODEL_COLUMNS, Prediction.recommended_model, 'model_other'),
+                                   (CONFIDENCE_COLUMNS, Prediction.confidence_level, 'confidence_other')):
+        for value, name in buckets.items():
+            columns.append(func.sum(case((source == value, 1), else_=0)).label(name))
+        # Incluye NULL, igual que row_deltas()
+        columns.append(func.sum(case((source.in_(list(buckets)), 0), else_=1)).label(other))
+    columns.append(literal(datetime.utcnow(), stats_table.c.updated_at.type).label('updated_at'))
+
+    aggregates = select(*columns).group_by(Prediction.user_id)
+    clear = delete(stats_table)
+    if user_id is not None:
+        aggregates = aggregates.where(Prediction.user_id == user_id)
+        clear = clear.where(stats_table.c.user_id == user_id)
+
+    connection.execute(clear)
+    connection.execute(insert(stats_table).from_select(list(aggregates.selected_columns.keys()), aggregates))
@@ -0,0 +1,186 @@
+"""
+Escritura diferida (write-behind) de Goal2Goal
+Las filas se acumulan en memoria y un hilo de fondo las inserta en MySQL con un único
+INSERT de varias filas cada 'flush_rows' filas o cada 'flush_interval' segundos, lo que
+ocurra antes. La respuesta HTTP ya no espera al commit. Al terminar el proceso se
+vacía el buffer (atexit y hook worker_exit de gunicorn).
+
+Si falla el INSERT de un lote, sus filas se reintentan una a una: una fila inválida
+(IntegrityError/DataError) va a la cola de descartes sin bloquear a las demás, y una fila
+que falla por otro motivo (MySQL caído) se reintenta hasta max_attempts veces.
+"""
+
+import os
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+
+from sqlalchemy.exc import IntegrityError, DataError
+
+logger = logging.getLogger(__name__)
+
+MODE_SYNC = 'sync'
+MODE_BATCHED = 'batched'
+
+
+def _reason(error):
+    # Mensaje del driver sin la sentencia SQL ni los parámetros de todo el lote
+    return str(getattr(error, 'orig', None) or error)
+
+
+class WriteBehindBuffer:
+    """
+    Buffer de filas para una tabla. Si falla la inserción, las filas vuelven al buffer
+    y se reintentan; por encima de max_pending se descartan las más antiguas.
+    on_flush(connection, rows) se llama en la misma transacción que cada INSERT.
+    Las últimas filas descartadas por inválidas quedan en dead_letters para revisarlas.
+    """
+
+    def __init__(self, table, flush_rows=100, flush_interval=0.5, max_pending=10000, on_flush=None,
+                 max_attempts=5, max_dead_letters=100):
+        self.table = table
+        self.on_flush = on_flush
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.written = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self.dead_lettered = 0
+        self.dead_letters = deque(maxlen=max_dead_letters)
+        # Elementos (fila, intentos fallidos)
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._app = None
+        self._db = None
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app, db):
+        self._app = app
+        self._db = db
+
+    def _ensure_thread(self):
+        """
+        Arranca el hilo de vaciado en el primer uso de cada proceso: los hilos no
+        sobreviven al fork de los workers de gunicorn (preload_app)
+        """
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                atexit.register(self.stop)
+            self._pid = os.getpid()
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+
+    def add(self, row):
+        """Encola una fila (dict columna -> valor)"""
+        self._ensure_thread()
+        with self._lock:
+            self._pending.append((row, 0))
+            if len(self._pending) > self.max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+                logger.error("❌ Buffer de escritura lleno: se descarta la fila más antigua")
+            full = len(self._pending) >= self.flush_rows
+        if full:
+            self._wakeup.set()
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if not self.flush():
+                # Reintento con espera si la base de datos no responde
+                time.sleep(min(self.flush_interval * 4, 5))
+
+    def flush(self):
+        """Inserta todas las filas pendientes en un único INSERT múltiple. Devuelve False si falló"""
+        with self._flush_lock:
+            with self._lock:
+                items = list(self._pending)
+                self._pending.clear()
+            if not items:
+                return True
+
+            try:
+                self._insert([row for row, _ in items])
+            except Exception as e:
+                with self._lock:
+                    self.failed_flushes += 1
+                logger.warning(f"⚠️ Falló el INSERT de {len(items)} filas en {self.table.name} ({_reason(e)}): "
+                               f"se reintentan una a una")
+                return self._flush_one_by_one(items)
+
+            with self._lock:
+                self.written += len(items)
+            logger.info(f"💾 {len(items)} filas insertadas en {self.table.name}")
+            return True
+
+    def _insert(self, rows):
+        with self._app.app_context():
+            with self._db.engine.begin() as connection:
+                connection.execute(self.table.insert(), rows)
+                if self.on_flush is not None:
+                    self.on_flush(connection, rows)
+
+    def _flush_one_by_one(self, items):
+        """Aísla las filas inválidas de un lote fallido. Devuelve False si quedan filas por reintentar"""
+        for position, (row, attempts) in enumerate(items):
+            try:
+                self._insert([row])
+            except (IntegrityError, DataError) as e:
+                self._dead_letter(row, e)
+                continue
+            except Exception as e:
+                # Error que no depende de la fila (conexión, bloqueo...): se reintenta el resto más tarde
+                retry = []
+                for pending_row, pending_attempts in items[position:]:
+                    if pending_attempts + 1 >= self.max_attempts:
+                        self._dead_letter(pending_row, e)
+                    else:
+                        retry.append((pending_row, pending_attempts + 1))
+                logger.error(f"❌ Error al insertar en {self.table.name}: {_reason(e)} ({len(retry)} filas para reintentar)")
+                with self._lock:
+                    self._pending.extendleft(reversed(retry))
+                    while len(self._pending) > self.max_pending:
+                        self._pending.popleft()
+                        self.dropped += 1
+                return False
+            with self._lock:
+                self.written += 1
+        return True
+
+    def _dead_letter(self, row, error):
+        with self._lock:
+            self.dead_lettered += 1
+            self.dead_letters.append({'row': row, 'error': _reason(error)})
+        logger.error(f"❌ Fila descartada de {self.table.name}: {_reason(error)}")
+
+    def stop(self):
+        """Detiene el hilo y vacía lo pendiente (al apagar el worker)"""
+        self._stopping = True
+        self._wakeup.set()
+        if self._app is not None:
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'pending': pending,
+            'written': self.written,
+            'failed_flushes': self.failed_flushes,
+            'dropped': self.dropped,
+            'dead_lettered': self.dead_lettered,
+            'flush_rows': self.flush_rows,
+            'flush_interval': self.flush_interval
+        }